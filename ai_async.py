@@ -0,0 +1,70 @@
+"""
+Asyncio front end for the AI services
+Runs independent advice requests concurrently (each on a worker thread) so
+a page that needs several AI outputs waits only for the slowest one.
+Concurrency is capped process-wide by a shared worker pool and each call has
+a deadline after which the rule-based answer is used.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking AI calls allowed in flight at once, across all sessions
+MAX_CONCURRENT_CALLS = int(os.environ.get("SHEFIN_AI_CONCURRENCY", "4"))
+
+# Own pool rather than the loop's default executor: asyncio.run() waits for
+# default-executor threads on exit, which would defeat the deadline
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="shefin-ai-async")
+
+
+class AsyncAIService:
+    """Awaitable versions of the FinancialChatbot / GoalPlanner methods"""
+
+    def __init__(self, chatbot, goal_planner, deadline=None):
+        self.chatbot = chatbot
+        self.goal_planner = goal_planner
+        # The chatbot hedges its own model calls; this outer deadline only
+        # catches calls that hang anyway
+        self.deadline = chatbot.deadline + 2 if deadline is None else deadline
+
+    async def _run(self, fn, *args, fallback=None):
+        """fn(*args) on a worker thread; fallback() if it misses the deadline or fails"""
+        try:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(_executor, fn, *args), self.deadline)
+        except Exception as e:
+            if fallback is None:
+                raise
+            print(f"Async AI call {getattr(fn, '__name__', fn)} fell back: {e!r}")
+            return fallback()
+
+    async def financial_advice(self, query, user_data, transactions, language='english'):
+        return await self._run(self.chatbot.get_financial_advice, query, user_data, transactions, language,
+                               fallback=lambda: self.chatbot._fallback_advice(query, user_data, transactions, language))
+
+    async def budget_insights(self, transactions, user_data, language='english'):
+        return await self._run(self.chatbot.get_budget_insights, transactions, user_data, language)
+
+    async def investment_recommendations(self, user_data, risk_tolerance, investment_horizon, amount,
+                                         language='english'):
+        return await self._run(self.chatbot.get_investment_recommendations, user_data, risk_tolerance,
+                               investment_horizon, amount, language)
+
+    async def scheme_information(self, query, user_data, language='english'):
+        return await self._run(self.chatbot.get_scheme_information, query, user_data, language,
+                               fallback=lambda: self.chatbot.get_government_schemes_info(language))
+
+    async def goal_recommendation(self, goal, user_data=None, language='english'):
+        return await self._run(self.goal_planner.get_goal_recommendations, goal, language, user_data,
+                               fallback=lambda: self.goal_planner.get_goal_recommendations(goal, language))
+
+    async def goal_recommendations(self, goals, user_data=None, language='english'):
+        """Recommendations for every goal, requested in parallel, in goal order"""
+        return list(await asyncio.gather(*(self.goal_recommendation(goal, user_data, language)
+                                           for goal in goals)))
+
+
+def run_async(coro):
+    """Run a coroutine to completion from synchronous code (e.g. a Streamlit page)"""
+    return asyncio.run(coro)
@@ -0,0 +1,254 @@
+"""
+Persistent cache for AI advice responses
+Keys are a hash of the normalized prompt + model + language, so repeated
+questions (quick tips, scheme queries) are answered without a model call
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from database_local import get_connection_pool
+
+
+class AIResponseCache:
+    """SQLite-backed response cache with TTL and LRU eviction by entry count.
+
+    Hits don't write: their access times are kept in memory and flushed in
+    one batch every touch_interval seconds (and before evicting). Expired
+    rows are purged from put() at most every purge_interval seconds.
+    """
+
+    def __init__(self, db_path="shefin_local.db", ttl_seconds=24 * 3600, max_entries=5000,
+                 touch_interval=60.0, purge_interval=3600.0):
+        self.pool = get_connection_pool(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._touched = {}      # cache_key -> (last access time, hits since last flush)
+        self._last_flush = time.monotonic()
+        self._last_purge = float('-inf')     # first put() purges
+        self.init_cache_table()
+
+    def init_cache_table(self):
+        """Create the cache table and its LRU index"""
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_accessed
+                ON ai_response_cache (last_accessed)
+            """)
+            conn.commit()
+
+    @staticmethod
+    def make_key(prompt, model, language='english'):
+        """Content-addressed key; case and whitespace differences don't matter"""
+        normalized = ' '.join(prompt.split()).casefold()
+        digest = hashlib.sha256(f"{model}\x1f{language}\x1f{normalized}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _touch(self, key, now):
+        """Record a hit; True when the batch of access times is due for a flush"""
+        with self._lock:
+            _, hits = self._touched.get(key, (now, 0))
+            self._touched[key] = (now, hits + 1)
+            return time.monotonic() - self._last_flush >= self.touch_interval
+
+    def _flush_touches(self, conn):
+        """Write pending access times and hit counts in one statement batch (caller commits)"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._last_flush = time.monotonic()
+        if touched:
+            conn.executemany(
+                "UPDATE ai_response_cache SET last_accessed = MAX(last_accessed, ?), hit_count = hit_count + ? "
+                "WHERE cache_key = ?",
+                [(accessed, hits, key) for key, (accessed, hits) in touched.items()])
+
+    def get(self, key):
+        """Cached response for key, or None if missing or expired"""
+        now = time.time()
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT response FROM ai_response_cache WHERE cache_key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)).fetchone()
+                if row and self._touch(key, now):
+                    self._flush_touches(conn)
+                    conn.commit()
+        except Exception as e:
+            print(f"Error reading AI response cache: {e}")
+            row = None
+
+        self._count(row is not None)
+        return row[0] if row else None
+
+    def put(self, key, response, model, language='english'):
+        """Store a response and evict least recently used entries over the limit"""
+        now = time.time()
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO ai_response_cache
+                    (cache_key, model, language, response, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (key, model, language, response, now, now))
+                if time.monotonic() - self._last_purge >= self.purge_interval:
+                    self._last_purge = time.monotonic()
+                    self._delete_expired(conn)
+                excess = conn.execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    # LRU order must see the hits not yet written
+                    self._flush_touches(conn)
+                    conn.execute("""
+                        DELETE FROM ai_response_cache WHERE cache_key IN (
+                            SELECT cache_key FROM ai_response_cache ORDER BY last_accessed LIMIT ?
+                        )
+                    """, (excess,))
+                    with self._lock:
+                        self.evictions += excess
+                conn.commit()
+        except Exception as e:
+            print(f"Error writing AI response cache: {e}")
+
+    def _delete_expired(self, conn):
+        return conn.execute("DELETE FROM ai_response_cache WHERE created_at < ?",
+                            (time.time() - self.ttl_seconds,)).rowcount
+
+    def purge_expired(self):
+        """Delete entries older than the TTL; returns how many were removed"""
+        with self.pool.connection() as conn:
+            removed = self._delete_expired(conn)
+            conn.commit()
+            return removed
+
+    def flush(self):
+        """Write pending access times now (e.g. before inspecting the table)"""
+        with self.pool.connection() as conn:
+            self._flush_touches(conn)
+            conn.commit()
+
+    def clear(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM ai_response_cache")
+            conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for this process plus current table size"""
+        with self.pool.connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide response cache; TTL and size come from SHEFIN_AI_CACHE_TTL / SHEFIN_AI_CACHE_SIZE"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AIResponseCache(
+                    ttl_seconds=int(os.environ.get("SHEFIN_AI_CACHE_TTL", 24 * 3600)),
+                    max_entries=int(os.environ.get("SHEFIN_AI_CACHE_SIZE", 5000)))
+    return _cache
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical requests into one call.
+
+    The first caller for a key runs the work; callers arriving while it is in
+    flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key):
+        """(call, is_leader); the leader must call finish() exactly once"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = _InFlightCall()
+            self._calls[key] = call
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    @staticmethod
+    def wait(call, timeout=None):
+        """The leader's result; re-raises its exception"""
+        if not call.done.wait(timeout):
+            raise TimeoutError("in-flight request did not finish in time")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs), shared with concurrent callers using the same key"""
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'leaders': self.leaders, 'coalesced': self.coalesced}
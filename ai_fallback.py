@@ -5,6 +5,15 @@ Provides pre-written financial advice responses for common queries
 
 import random
 from translations import translate_text
+from intent_matcher import classify_intent
+
+# Intents from intent_matcher -> canned response categories
+FALLBACK_CATEGORIES = {
+    'budget_analysis': 'budgeting',
+    'investment_advice': 'investment',
+    'savings_help': 'savings',
+    'government_schemes': 'government_schemes',
+}
 
 class FallbackFinancialAdvisor:
     def __init__(self):
@@ -68,20 +77,8 @@ class FallbackFinancialAdvisor:
     
     def get_response(self, query, user_data=None, language='english'):
         """Get fallback response based on query keywords"""
-        query_lower = query.lower()
-        
-        # Detect query type based on keywords
-        if any(word in query_lower for word in ['budget', 'budgeting', 'expense', 'spending', 'money management']):
-            category = 'budgeting'
-        elif any(word in query_lower for word in ['invest', 'investment', 'mutual fund', 'sip', 'share', 'stock']):
-            category = 'investment'
-        elif any(word in query_lower for word in ['save', 'saving', 'emergency fund', 'bank account']):
-            category = 'savings'
-        elif any(word in query_lower for word in ['government', 'scheme', 'yojana', 'loan', 'subsidy']):
-            category = 'government_schemes'
-        else:
-            # Default general advice
-            category = 'budgeting'
+        # Detect query type from the best matching intent (budgeting by default)
+        category = FALLBACK_CATEGORIES.get(classify_intent(query), 'budgeting')
         
         # Get appropriate response
         if category in self.responses and language in self.responses[category]:
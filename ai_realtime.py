@@ -5,57 +5,129 @@ Provides more intelligent responses than static fallbacks
 
 import re
 import random
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
 from translations import translate_text
+from intent_matcher import classify_intent
 
-class RealTimeFinancialAI:
-    def __init__(self):
-        self.conversation_history = []
+
+class ConversationSession:
+    """One session's recent turns and the profile it was last seen with"""
+
+    def __init__(self, max_turns):
+        self.history = deque(maxlen=max_turns)
         self.user_context = {}
+        self.last_seen = time.monotonic()
+
+
+class ConversationStore:
+    """Per-session conversation memory with bounded size.
+
+    Each session keeps at most max_turns exchanges (a ring buffer); sessions
+    idle for idle_timeout seconds are dropped, and beyond max_sessions the
+    least recently used one is. If persist is set it is called as
+    persist(session_id, query, response) for every exchange, e.g.
+    LocalDatabaseManager.save_chat_history when sessions are keyed by user id.
+    """
+
+    def __init__(self, max_turns=20, idle_timeout=1800, max_sessions=1000, persist=None):
+        self.max_turns = max_turns
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.persist = persist
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _evict(self, now):
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_seen < self.idle_timeout:
+                break
+            del self._sessions[oldest_id]
+            self.evictions += 1
+
+    def session(self, session_id):
+        """Get (or start) a session and mark it active"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ConversationSession(self.max_turns)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            self._evict(now)
+            return session
+
+    def record(self, session_id, query, response):
+        """Append an exchange to the session and persist it if configured"""
+        session = self.session(session_id)
+        with self._lock:
+            session.history.append({'query': query, 'response': response, 'timestamp': datetime.now()})
+        if self.persist and session_id is not None:
+            try:
+                self.persist(session_id, query, response)
+            except Exception as e:
+                print(f"Error persisting conversation: {e}")
+
+    def history(self, session_id):
+        """Recent exchanges for a session, oldest first"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.history) if session else []
+
+    def end_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'turns': sum(len(s.history) for s in self._sessions.values()),
+                'evictions': self.evictions
+            }
+
+
+class RealTimeFinancialAI:
+    def __init__(self, conversations=None):
+        # Shared by every session that uses this instance; memory is per session
+        self.conversations = conversations or ConversationStore()
         
-    def analyze_query(self, query, user_data=None, transactions=None):
+    def analyze_query(self, query, user_data=None, transactions=None, session_id=None):
         """Analyze user query and generate contextual response"""
         query_lower = query.lower()
+        if session_id is None and user_data:
+            session_id = user_data.get('id')
         
-        # Update user context
-        if user_data:
-            self.user_context.update(user_data)
+        # Update this session's user context (anonymous queries keep none)
+        if session_id is None:
+            user_context = dict(user_data or {})
+        else:
+            user_context = self.conversations.session(session_id).user_context
+            if user_data:
+                user_context.update(user_data)
         
         # Calculate financial metrics if transactions available
         financial_summary = self._calculate_financial_summary(transactions) if transactions else {}
         
         # Determine query intent and generate response
         intent = self._classify_intent(query_lower)
-        response = self._generate_contextual_response(query, intent, financial_summary)
+        response = self._generate_contextual_response(query, intent, financial_summary, user_context)
         
         # Store conversation
-        self.conversation_history.append({
-            'query': query,
-            'response': response,
-            'timestamp': datetime.now()
-        })
+        if session_id is not None:
+            self.conversations.record(session_id, query, response)
         
         return response
     
     def _classify_intent(self, query):
         """Classify user intent from query"""
-        intents = {
-            'budget_analysis': ['budget', 'spending', 'expense', 'money management', 'track'],
-            'investment_advice': ['invest', 'investment', 'mutual fund', 'sip', 'shares', 'returns'],
-            'savings_help': ['save', 'saving', 'emergency fund', 'deposit'],
-            'government_schemes': ['government', 'scheme', 'yojana', 'loan', 'subsidy'],
-            'goal_planning': ['goal', 'target', 'plan', 'achieve', 'future'],
-            'debt_management': ['debt', 'loan', 'emi', 'credit card', 'repay'],
-            'tax_planning': ['tax', 'saving', '80c', 'deduction', 'rebate'],
-            'insurance': ['insurance', 'policy', 'cover', 'protection'],
-            'greeting': ['hello', 'hi', 'hey', 'good morning', 'good evening']
-        }
-        
-        for intent, keywords in intents.items():
-            if any(keyword in query for keyword in keywords):
-                return intent
-        
-        return 'general_advice'
+        return classify_intent(query)
     
     def _calculate_financial_summary(self, transactions):
         """Calculate financial metrics from transactions"""
@@ -85,10 +157,10 @@ class RealTimeFinancialAI:
             'transaction_count': len(transactions)
         }
     
-    def _generate_contextual_response(self, query, intent, financial_summary):
+    def _generate_contextual_response(self, query, intent, financial_summary, user_context):
         """Generate intelligent response based on context"""
-        user_name = self.user_context.get('name', 'there')
-        monthly_income = self.user_context.get('monthly_income', 0)
+        user_name = user_context.get('name', 'there')
+        monthly_income = user_context.get('monthly_income', 0)
         
         if intent == 'greeting':
             return f"Hello {user_name}! I'm your personal financial advisor. How can I help you manage your finances better today?"
@@ -114,7 +186,7 @@ class RealTimeFinancialAI:
             return response
         
         elif intent == 'investment_advice':
-            age = self.user_context.get('age', 30)
+            age = user_context.get('age', 30)
             risk_advice = self._get_age_appropriate_investment_advice(age, monthly_income)
             
             return f"Based on your profile, {user_name}, here's my investment recommendation:\n\n{risk_advice}\n\nRemember: Start small, stay consistent, and never invest money you can't afford to lose."
@@ -129,13 +201,13 @@ class RealTimeFinancialAI:
                 return self._get_general_savings_advice()
         
         elif intent == 'government_schemes':
-            return self._get_personalized_scheme_advice()
+            return self._get_personalized_scheme_advice(user_context)
         
         elif intent == 'goal_planning':
             return f"Excellent, {user_name}! Goal-based planning is key to financial success. Here's how to approach it:\n\n1. Define SMART goals (Specific, Measurable, Achievable, Relevant, Time-bound)\n2. Calculate required monthly savings\n3. Choose appropriate investment vehicles\n4. Automate contributions\n5. Review progress quarterly\n\nWhat specific goal are you planning for? Home, education, retirement, or something else?"
         
         else:
-            return self._get_personalized_general_advice()
+            return self._get_personalized_general_advice(user_context)
     
     def _get_category_specific_advice(self, category):
         """Get advice specific to spending category"""
@@ -161,9 +233,9 @@ class RealTimeFinancialAI:
         """General savings advice when no specific data available"""
         return "Here are proven savings strategies:\n\n1. Pay yourself first - save before spending\n2. Automate savings transfers\n3. Use the 52-week savings challenge\n4. Open high-yield savings accounts\n5. Reduce unnecessary subscriptions\n6. Cook at home more often\n7. Compare prices before purchases"
     
-    def _get_personalized_scheme_advice(self):
+    def _get_personalized_scheme_advice(self, user_context):
         """Get personalized government scheme advice"""
-        age = self.user_context.get('age', 30)
+        age = user_context.get('age', 30)
         schemes = []
         
         if age <= 45:
@@ -178,9 +250,9 @@ class RealTimeFinancialAI:
         
         return f"Based on your profile, these government schemes can benefit you:\n\n" + "\n".join(schemes) + "\n\nVisit your nearest bank for applications and detailed eligibility criteria."
     
-    def _get_personalized_general_advice(self):
+    def _get_personalized_general_advice(self, user_context):
         """Personalized general financial advice"""
-        name = self.user_context.get('name', 'there')
+        name = user_context.get('name', 'there')
         
         return f"Here's my general financial guidance for you, {name}:\n\n1. Emergency Fund: Build 6 months of expenses\n2. Insurance: Get adequate health and term life coverage\n3. Investments: Start SIP in mutual funds\n4. Debt: Pay off high-interest debt first\n5. Tax Planning: Use 80C deductions effectively\n6. Regular Review: Monitor and adjust quarterly\n\nWhat specific area would you like to focus on first?"
 
@@ -0,0 +1,239 @@
+"""
+Resilience layer for calls to the Gemini API
+Token-bucket rate limiting, bounded retries with jittered exponential backoff
+and a circuit breaker, shared by every request in the process so a failing
+endpoint is not hammered by each Streamlit session
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# google.api_core exception names worth retrying (matched by name so the
+# SDK stays an optional import)
+RETRYABLE_ERRORS = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded',
+    'InternalServerError', 'BadGateway', 'GatewayTimeout', 'RetryError',
+}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ServiceUnavailableError(RuntimeError):
+    """The call was not made or did not succeed; use the fallback advisor"""
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """The circuit breaker is open"""
+
+
+class RateLimitedError(ServiceUnavailableError):
+    """No request token became available in time"""
+
+
+def is_retryable(exc):
+    """Transient errors: throttling, 5xx, timeouts and dropped connections"""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    if type(exc).__name__ in RETRYABLE_ERRORS:
+        return True
+    code = getattr(exc, 'code', None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=0.0):
+        """Take one token, waiting up to timeout seconds; False if none came"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures.
+
+    While open every call is rejected; after `reset_timeout` seconds one
+    trial call is let through (half-open) and its outcome closes or re-opens
+    the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call whose outcome says nothing about the endpoint's health;
+        if it was the half-open trial, the next call becomes the trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logging.warning(f"Gemini circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class ResilienceMetrics:
+    """Counters plus a window of recent call latencies"""
+
+    def __init__(self, window=500):
+        self.counts = {'calls': 0, 'successes': 0, 'failures': 0, 'retries': 0,
+                       'rate_limited': 0, 'short_circuited': 0}
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def incr(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def observe(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self.counts)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        counts.update({
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+            'latency_max': latencies[-1] if latencies else 0.0,
+        })
+        return counts
+
+
+class ResilientCaller:
+    """Run calls through the rate limiter, retry policy and circuit breaker"""
+
+    def __init__(self, rate=2.0, burst=5, max_retries=2, base_delay=0.5, max_delay=8.0,
+                 failure_threshold=5, reset_timeout=30.0, acquire_timeout=2.0, ignore=()):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = ResilienceMetrics()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.ignore = ignore    # caller errors (bad config) that must not trip the breaker
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), raising ServiceUnavailableError when it can't"""
+        self.metrics.incr('calls')
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self.metrics.incr('short_circuited')
+                raise CircuitOpenError("Gemini circuit breaker is open")
+            if not self.bucket.acquire(self.acquire_timeout):
+                self.metrics.incr('rate_limited')
+                raise RateLimitedError("Gemini request rate limit reached")
+
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except self.ignore:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                self.metrics.observe(time.monotonic() - started)
+                if not is_retryable(e):
+                    # The endpoint answered (bad request, blocked response): not an outage
+                    self.breaker.release()
+                    self.metrics.incr('failures')
+                    raise ServiceUnavailableError(str(e)) from e
+                self.breaker.record_failure()
+                if attempt < self.max_retries:
+                    self.metrics.incr('retries')
+                    logging.warning(f"Gemini call failed ({e}), retrying")
+                    time.sleep(self.backoff(attempt))
+                    continue
+                self.metrics.incr('failures')
+                raise ServiceUnavailableError(str(e)) from e
+
+            self.metrics.observe(time.monotonic() - started)
+            self.breaker.record_success()
+            self.metrics.incr('successes')
+            return result
+
+    def stats(self):
+        stats = self.metrics.snapshot()
+        stats.update({'circuit_state': self.breaker.state, 'circuit_trips': self.breaker.trips})
+        return stats
+
+
+def caller_from_env(ignore=()):
+    """ResilientCaller configured from SHEFIN_AI_* environment variables"""
+    env = os.environ.get
+    return ResilientCaller(
+        rate=float(env("SHEFIN_AI_RATE", "2")),
+        burst=int(env("SHEFIN_AI_BURST", "5")),
+        max_retries=int(env("SHEFIN_AI_RETRIES", "2")),
+        base_delay=float(env("SHEFIN_AI_BACKOFF", "0.5")),
+        failure_threshold=int(env("SHEFIN_AI_BREAKER_FAILURES", "5")),
+        reset_timeout=float(env("SHEFIN_AI_BREAKER_RESET", "30")),
+        ignore=ignore)
@@ -1,18 +1,94 @@
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from utils import format_currency
 from translations import translate_text
 from ai_fallback import FallbackFinancialAdvisor
 from ai_realtime import RealTimeFinancialAI
-from gemini_ai import get_financial_advice, analyze_budget, get_investment_guidance, get_government_scheme_advice
+from gemini_ai import cached_advice, generate_advice, stream_advice, analyze_budget, get_investment_guidance, get_government_scheme_advice
+from prompt_context import build_financial_digest
+from monte_carlo import portfolio_for_horizon, simulate_goal
 from dotenv import load_dotenv
 
+load_dotenv()
+
+# Seconds to wait for Gemini before answering with the rule-based advisor
+AI_DEADLINE = float(os.getenv("SHEFIN_AI_DEADLINE", "8"))
+
+# Model calls run here so a slow request never blocks the caller past its deadline
+_ai_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SHEFIN_AI_WORKERS", "4")),
+                                  thread_name_prefix="shefin-ai")
+
+_STREAM_DONE = object()
+
+# Goal tips used to be static and instant; a model tip is only waited for this long
+GOAL_AI_DEADLINE = float(os.getenv("SHEFIN_GOAL_AI_DEADLINE", "0.5"))
+
+# Goal tips are background work: their own small pool, so they never hold the chat's workers
+_goal_tip_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SHEFIN_GOAL_AI_WORKERS", "1")),
+                                        thread_name_prefix="shefin-goal-tips")
+# Tip requests queued or running, by prompt; beyond the limit the static tip is used
+_goal_tips_pending = {}
+_goal_tips_lock = threading.Lock()
+MAX_PENDING_GOAL_TIPS = int(os.getenv("SHEFIN_GOAL_AI_PENDING", "16"))
+
+# Share of simulated market paths on which a goal plan should succeed
+GOAL_CONFIDENCE = 0.8
+
+
+class HedgedAdvice:
+    """Answer returned within the deadline, plus the model call if still running"""
+
+    def __init__(self, text, source, pending=None):
+        self.text = text
+        self.source = source        # 'model' or 'fallback'
+        self.pending = pending      # Future of the late model answer, or None
+
+    def model_answer(self, timeout=None):
+        """Wait for the late model answer; None if it fails, is unusable or times out"""
+        if self.pending is None:
+            return None
+        try:
+            return self.pending.result(timeout=timeout)
+        except Exception:
+            return None
+
+
+def _usable(response):
+    return bool(response) and len(response.strip()) > 20
+
+
+def _goal_tip_future(prompt, language):
+    """Future of the model tip for prompt, reusing a pending request; None when too many are pending"""
+    key = (prompt, language)
+    with _goal_tips_lock:
+        future = _goal_tips_pending.get(key)
+        if future is not None:
+            return future
+        if len(_goal_tips_pending) >= MAX_PENDING_GOAL_TIPS:
+            return None
+        future = _goal_tip_executor.submit(generate_advice, prompt, language)
+        _goal_tips_pending[key] = future
+    # Outside the lock: the callback runs at once if the tip is already done
+    future.add_done_callback(lambda _: _forget_goal_tip(key, future))
+    return future
+
+
+def _forget_goal_tip(key, future):
+    with _goal_tips_lock:
+        if _goal_tips_pending.get(key) is future:
+            del _goal_tips_pending[key]
+
+
 class FinancialChatbot:
-    def __init__(self):
+    def __init__(self, deadline=None):
         self.fallback_advisor = FallbackFinancialAdvisor()
         self.realtime_ai = RealTimeFinancialAI()
         self.use_ai = False
+        self.deadline = AI_DEADLINE if deadline is None else deadline
         
         # Try to initialize Gemini AI
         try:
@@ -27,55 +103,136 @@ class FinancialChatbot:
             print(f"❌ Gemini AI initialization failed: {e}")
             print("🔄 Using enhanced intelligent fallback responses")
 
-    def get_financial_advice(self, query, user_data, transactions, language='english'):
-        """Get personalized financial advice"""
-        if self.use_ai and language == 'english':
-            try:
-                # Prepare context for Gemini AI
-                expense_transactions = [t for t in transactions if t['type'] == 'expense'] if transactions else []
-                income_transactions = [t for t in transactions if t['type'] == 'income'] if transactions else []
-                
-                total_expenses = sum([t['amount'] for t in expense_transactions])
-                total_income = sum([t['amount'] for t in income_transactions])
-                
-                user_context = f"""
-                User Profile:
-                - Name: {user_data['name']}
-                - Age: {user_data['age']}
-                - Monthly Income: ₹{user_data['monthly_income']}
-                - Recent Total Expenses: ₹{total_expenses}
-                - Recent Total Income: ₹{total_income}
-                """
-                
-                transaction_summary = f"Recent transactions: {len(expense_transactions)} expenses totaling ₹{total_expenses}, {len(income_transactions)} income entries totaling ₹{total_income}"
-                
-                prompt = f"""
-                You are SheFin, an AI financial advisor for women in India. Provide specific, actionable advice.
-                
-                {user_context}
-                {transaction_summary}
-                
-                User Question: {query}
-                
-                Please provide personalized financial advice that is:
-                1. Specific to her situation
-                2. Culturally appropriate for Indian women
-                3. Action-oriented with clear next steps
-                4. Encouraging and supportive
-                """
-                
-                ai_response = get_financial_advice(prompt)
-                if ai_response and len(ai_response.strip()) > 20:
-                    return ai_response
-                    
-            except Exception as e:
-                print(f"Gemini AI error: {e}")
+    def _build_advice_prompt(self, query, user_data, transactions):
+        """Build the Gemini prompt for a user question"""
+        # Bounded digest instead of the raw history keeps prompt size constant
+        digest = build_financial_digest(transactions, user_data)
+
+        return f"""
+        You are SheFin, an AI financial advisor for women in India. Provide specific, actionable advice.
         
-        # Fallback to intelligent responses
+        {digest}
+        
+        User Question: {query}
+        
+        Please provide personalized financial advice that is:
+        1. Specific to her situation
+        2. Culturally appropriate for Indian women
+        3. Action-oriented with clear next steps
+        4. Encouraging and supportive
+        """
+
+    def _fallback_advice(self, query, user_data, transactions, language, session_id=None):
+        """Rule-based answer used when Gemini is off or fails"""
         if language == 'english':
-            return self.realtime_ai.analyze_query(query, user_data, transactions)
+            return self.realtime_ai.analyze_query(query, user_data, transactions, session_id)
         else:
-            return self.fallback_advisor.get_response(query, user_data, language)
+            response = self.fallback_advisor.get_response(query, user_data, language)
+            self._remember(session_id, query, response)
+            return response
+
+    def _remember(self, session_id, query, response):
+        """Add an exchange the rule-based advisor didn't produce to the session memory"""
+        if session_id is not None:
+            self.realtime_ai.conversations.record(session_id, query, response)
+
+    def _model_advice(self, prompt, language):
+        """Blocking Gemini call; None when the answer is unusable"""
+        response = generate_advice(prompt, language)
+        return response if _usable(response) else None
+
+    def get_hedged_advice(self, query, user_data, transactions, language='english', deadline=None,
+                          session_id=None):
+        """Race Gemini against the rule-based advisor.
+
+        The model call runs on a worker; if it hasn't answered within the
+        deadline the fallback answer is returned straight away and the
+        still-running call is exposed as .pending so callers can swap it in.
+        """
+        if not (self.use_ai and language == 'english'):
+            return HedgedAdvice(self._fallback_advice(query, user_data, transactions, language, session_id),
+                                'fallback')
+
+        deadline = self.deadline if deadline is None else deadline
+        try:
+            prompt = self._build_advice_prompt(query, user_data, transactions)
+            future = _ai_executor.submit(self._model_advice, prompt, language)
+            ai_response = future.result(timeout=deadline)
+            if ai_response:
+                self._remember(session_id, query, ai_response)
+                return HedgedAdvice(ai_response, 'model')
+            future = None
+        except FutureTimeoutError:
+            print(f"Gemini AI did not answer within {deadline}s, using fallback")
+        except Exception as e:
+            print(f"Gemini AI error: {e}")
+            future = None
+
+        # Fallback to intelligent responses
+        return HedgedAdvice(self._fallback_advice(query, user_data, transactions, language, session_id),
+                            'fallback', future)
+
+    def get_financial_advice(self, query, user_data, transactions, language='english', deadline=None,
+                             session_id=None):
+        """Get personalized financial advice within the latency budget"""
+        return self.get_hedged_advice(query, user_data, transactions, language, deadline, session_id).text
+
+    def _pump_stream(self, prompt, language, chunks):
+        """Worker: copy model chunks into a queue (drains fully so the answer gets cached)"""
+        try:
+            for chunk in stream_advice(prompt, language):
+                chunks.put(chunk)
+        except Exception as e:
+            print(f"Gemini AI streaming error: {e}")
+        finally:
+            chunks.put(_STREAM_DONE)
+
+    def stream_financial_advice(self, query, user_data, transactions, language='english',
+                                deadline=None, late_answer=False, session_id=None):
+        """Yield personalized advice in chunks as the model produces them.
+
+        If the first chunk doesn't arrive within the deadline the rule-based
+        answer is yielded instead. With late_answer=True the model answer is
+        then appended after it once it arrives.
+        """
+        if not (self.use_ai and language == 'english'):
+            yield self._fallback_advice(query, user_data, transactions, language, session_id)
+            return
+
+        deadline = self.deadline if deadline is None else deadline
+        prompt = self._build_advice_prompt(query, user_data, transactions)
+        chunks = queue.Queue()
+        _ai_executor.submit(self._pump_stream, prompt, language, chunks)
+
+        try:
+            first = chunks.get(timeout=deadline)
+        except queue.Empty:
+            print(f"Gemini AI did not start streaming within {deadline}s, using fallback")
+            yield self._fallback_advice(query, user_data, transactions, language, session_id)
+            if not late_answer:
+                return
+            late = ""
+            while (chunk := chunks.get()) is not _STREAM_DONE:
+                late += chunk
+            if _usable(late):
+                yield "\n\n---\n\n" + late
+            return
+
+        streamed = ""
+        chunk = first
+        while chunk is not _STREAM_DONE:
+            streamed += chunk
+            yield chunk
+            chunk = chunks.get()
+
+        if _usable(streamed):
+            self._remember(session_id, query, streamed)
+            return
+        if streamed:
+            yield "\n\n"
+
+        # Fallback to intelligent responses (arrives as a single chunk)
+        yield self._fallback_advice(query, user_data, transactions, language, session_id)
 
     def get_budget_insights(self, transactions, user_data, language='english'):
         """Generate budget insights"""
@@ -99,7 +256,7 @@ class FinancialChatbot:
         
         if self.use_ai and language == 'english':
             try:
-                transactions_data = f"Total expenses: ₹{total_expenses}, Top spending category: {top_category}, Category breakdown: {category_spending}"
+                transactions_data = build_financial_digest(transactions)
                 user_context = f"Monthly income: ₹{user_data['monthly_income']}, Age: {user_data['age']}, Name: {user_data['name']}"
                 
                 ai_response = analyze_budget(transactions_data, user_context)
@@ -298,7 +455,6 @@ class GoalPlanner:
         target_datetime = datetime.combine(target_date, datetime.min.time())
         months_to_goal = max(1, (target_datetime - today).days // 30)
         
-        monthly_savings_required = target_amount / months_to_goal
         current_income = user_data['monthly_income']
         
         # Calculate current expenses
@@ -310,19 +466,27 @@ class GoalPlanner:
             
         available_for_savings = current_income - current_expenses
         
-        if monthly_savings_required <= available_for_savings:
+        # Simulate investing today's surplus in a portfolio suited to the horizon
+        portfolio, expected_return, volatility = portfolio_for_horizon(months_to_goal)
+        simulation = simulate_goal(target_amount, months_to_goal, max(available_for_savings, 0),
+                                   annual_return=expected_return, volatility=volatility)
+        success_probability = simulation.success_probability()
+        monthly_savings_required = simulation.contribution_for(GOAL_CONFIDENCE)
+        
+        if success_probability >= GOAL_CONFIDENCE:
             difficulty = "achievable"
-        elif monthly_savings_required <= available_for_savings * 1.5:
+        elif success_probability >= 0.4 or monthly_savings_required <= available_for_savings * 1.5:
             difficulty = "challenging"
         else:
             difficulty = "very challenging"
             
         plan = f"""
         **Goal: {goal_name}**
-        **Target: ₹{format_currency(target_amount)} by {target_date}**
+        **Target: ₹{format_currency(target_amount)} by {target_date}** (in today's prices)
         
         **Action Plan:**
-        • Monthly savings needed: ₹{format_currency(monthly_savings_required)}
+        • Monthly investment needed: ₹{format_currency(monthly_savings_required)} in {portfolio} ({GOAL_CONFIDENCE:.0%} chance of success)
+        • Chance of success investing your current surplus: {success_probability:.0%}
         • Goal difficulty: {difficulty}
         • Timeline: {months_to_goal} months
         
@@ -354,11 +518,39 @@ class GoalPlanner:
         
         return translate_text(plan, language)
 
-    def get_goal_recommendations(self, goal, language='english'):
-        """Get recommendations for achieving a goal"""
+    def get_goal_recommendations(self, goal, language='english', user_data=None, deadline=None):
+        """Get recommendations for achieving a goal.
+
+        With user_data a cached Gemini tip is used if there is one. Otherwise
+        one is requested on the goal tip pool and waited on for a short
+        deadline; a slower answer keeps running and lands in the response
+        cache, so it replaces the static tip on a later rerun. Reruns while it
+        is still pending wait on the same request instead of queueing another.
+        """
         goal_type = goal.get('category', 'General')
         target_amount = goal.get('target_amount', 0)
         
+        if self.use_ai and language == 'english' and user_data:
+            deadline = GOAL_AI_DEADLINE if deadline is None else deadline
+            try:
+                prompt = f"""
+        You are SheFin, an AI financial advisor for women in India. In 2-3 sentences, suggest how to reach this goal.
+        
+        Goal: {goal.get('name')} ({goal_type}), target ₹{target_amount}, saved ₹{goal.get('current_amount', 0)}, by {goal.get('target_date')}
+        Profile: age {user_data['age']}, monthly income ₹{user_data['monthly_income']}
+        """
+                ai_response = cached_advice(prompt, language)
+                if ai_response is None:
+                    future = _goal_tip_future(prompt, language)
+                    if future is not None:
+                        ai_response = future.result(timeout=deadline)
+                if _usable(ai_response):
+                    return ai_response
+            except FutureTimeoutError:
+                print(f"Gemini AI goal recommendation not ready within {deadline}s, using static tip")
+            except Exception as e:
+                print(f"Gemini AI goal recommendation error: {e}")
+        
         recommendations = {
             'Emergency Fund': f"Build your emergency fund gradually. Aim for 6 months of expenses (₹{format_currency(target_amount)}). Keep it in liquid funds or savings account for easy access.",
             'Child Education': f"Education costs are rising at 10-12% annually. Consider starting early with equity mutual funds through SIP. Sukanya Samriddhi Yojana is excellent for girl child education.",
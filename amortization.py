@@ -0,0 +1,138 @@
+"""
+Loan amortization schedules
+Month-by-month EMI schedules produced lazily, with part-prepayments, rate
+resets and the choice of shortening the tenure or lowering the EMI.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+AmortizationRow = namedtuple('AmortizationRow',
+                             ['month', 'annual_rate', 'emi', 'interest', 'principal', 'prepayment', 'balance'])
+
+SCHEDULE_DTYPE = np.dtype([
+    ('month', np.int32),
+    ('annual_rate', np.float64),
+    ('emi', np.float64),
+    ('interest', np.float64),
+    ('principal', np.float64),
+    ('prepayment', np.float64),
+    ('balance', np.float64),
+])
+
+REDUCE_OPTIONS = ('tenure', 'emi')
+
+# Balances below this (in rupees) count as repaid
+_PAID_OFF = 0.01
+
+
+def emi_for(principal, annual_rate, months):
+    """Level monthly instalment that repays principal over months"""
+    monthly_rate = annual_rate / (12 * 100)
+    if monthly_rate == 0:
+        return principal / months
+    growth = (1 + monthly_rate) ** months
+    return principal * monthly_rate * growth / (growth - 1)
+
+
+def iter_schedule(principal, annual_rate, years, prepayments=None, rate_changes=None, reduce='tenure'):
+    """Yield an AmortizationRow for each month until the loan is repaid.
+
+    prepayments maps month number (1-based) to an extra principal payment
+    made after that month's EMI; rate_changes maps month number to the new
+    annual rate from that month on. With reduce='tenure' the EMI stays the
+    same and the loan ends earlier (or later, after a rate rise); with
+    reduce='emi' the EMI is recalculated over the remaining original tenure.
+    A rate rise that the current EMI would no longer cover re-fixes the EMI
+    over the remaining tenure in either mode.
+    """
+    if reduce not in REDUCE_OPTIONS:
+        raise ValueError(f"reduce must be one of {', '.join(REDUCE_OPTIONS)}")
+    prepayments = prepayments or {}
+    rate_changes = rate_changes or {}
+    total_months = int(round(years * 12))
+    balance = float(principal)
+    rate = annual_rate
+    emi = emi_for(balance, rate, total_months)
+    month = 0
+
+    while balance > _PAID_OFF:
+        month += 1
+        remaining = max(total_months - month + 1, 1)
+        if month in rate_changes:
+            rate = rate_changes[month]
+            if reduce == 'emi' or emi <= balance * rate / (12 * 100):
+                emi = emi_for(balance, rate, remaining)
+
+        interest = balance * rate / (12 * 100)
+        principal_paid = min(emi - interest, balance)
+        balance -= principal_paid
+        prepayment = min(prepayments.get(month, 0), balance)
+        balance -= prepayment
+        if balance <= _PAID_OFF:
+            balance = 0.0
+
+        yield AmortizationRow(month, rate, interest + principal_paid, interest, principal_paid, prepayment, balance)
+
+        if prepayment and reduce == 'emi' and balance:
+            emi = emi_for(balance, rate, max(remaining - 1, 1))
+
+
+def amortization_schedule(principal, annual_rate, years, prepayments=None, rate_changes=None, reduce='tenure',
+                          as_array=False):
+    """The schedule as a lazy iterator of AmortizationRow, or as a NumPy
+    structured array (SCHEDULE_DTYPE) when as_array is set"""
+    rows = iter_schedule(principal, annual_rate, years, prepayments, rate_changes, reduce)
+    if as_array:
+        return np.fromiter(rows, dtype=SCHEDULE_DTYPE)
+    return rows
+
+
+def schedule_totals(rows):
+    """Totals of a schedule; iterator input is consumed without being stored.
+    final_emi is the last regular instalment (the closing one is usually smaller)."""
+    if isinstance(rows, np.ndarray) and len(rows):
+        emis = rows['emi']
+        return {
+            'months': len(rows),
+            'total_interest': float(rows['interest'].sum()),
+            'total_prepaid': float(rows['prepayment'].sum()),
+            'total_paid': float(emis.sum() + rows['prepayment'].sum()),
+            'first_emi': float(emis[0]),
+            'final_emi': float(emis[max(len(emis) - 2, 0)]),
+        }
+
+    months = 0
+    total_interest = total_prepaid = total_paid = 0.0
+    first_emi = final_emi = previous_emi = 0.0
+    for row in rows:
+        months += 1
+        total_interest += row.interest
+        total_prepaid += row.prepayment
+        total_paid += row.emi + row.prepayment
+        if months == 1:
+            first_emi = final_emi = row.emi
+        else:
+            final_emi = previous_emi
+        previous_emi = row.emi
+    return {
+        'months': months,
+        'total_interest': total_interest,
+        'total_prepaid': total_prepaid,
+        'total_paid': total_paid,
+        'first_emi': first_emi,
+        'final_emi': final_emi,
+    }
+
+
+def compare_prepayment(principal, annual_rate, years, prepayments, rate_changes=None):
+    """What-if comparison of no prepayment vs prepaying with each reduce option"""
+    baseline = schedule_totals(iter_schedule(principal, annual_rate, years, rate_changes=rate_changes))
+    comparison = {'baseline': baseline}
+    for reduce in REDUCE_OPTIONS:
+        totals = schedule_totals(iter_schedule(principal, annual_rate, years, prepayments, rate_changes, reduce))
+        totals['interest_saved'] = baseline['total_interest'] - totals['total_interest']
+        totals['months_saved'] = baseline['months'] - totals['months']
+        comparison[reduce] = totals
+    return comparison
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import time
 
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
@@ -9,11 +9,19 @@ import json
 
 from ai_services import FinancialChatbot, CreditScorer, GoalPlanner
 from financial_calculator import FinancialCalculator
+from monte_carlo import simulate_goal
+from amortization import amortization_schedule, schedule_totals
+from tax_engine import DEFAULT_YEAR, TAX_RULES, compare_regimes
 from utils import format_currency, get_user_language, translate_text
 from government_schemes import get_schemes_for_user
 from translations import TRANSLATIONS
 
 from mood_tracker import MoneyMoodTracker
+from statement_import import import_statement
+from user_data_context import UserDataContext
+from ai_async import run_async
+
+TRANSACTIONS_PAGE_SIZE = 50
 
 # Initialize session state
 if 'user_id' not in st.session_state:
@@ -38,7 +46,10 @@ def get_database():
 def get_chatbot():
     """Initialize chatbot once and cache it"""
     from ai_services import FinancialChatbot
-    return FinancialChatbot()
+    chatbot = FinancialChatbot()
+    # Conversations are keyed by user id, so they map onto chat_history
+    chatbot.realtime_ai.conversations.persist = get_database().save_chat_history
+    return chatbot
 
 
 @st.cache_resource
@@ -62,6 +73,13 @@ def get_goal_planner():
     return GoalPlanner()
 
 
+@st.cache_resource
+def get_ai_service():
+    """Async AI front end sharing the cached chatbot and goal planner"""
+    from ai_async import AsyncAIService
+    return AsyncAIService(get_chatbot(), get_goal_planner())
+
+
 @st.cache_resource
 def get_mood_tracker():
     """Initialize mood tracker once and cache it"""
@@ -74,6 +92,7 @@ chatbot = get_chatbot()
 calculator = get_calculator()
 credit_scorer = get_credit_scorer()
 goal_planner = get_goal_planner()
+ai_service = get_ai_service()
 mood_tracker = get_mood_tracker()
 
 
@@ -145,6 +164,9 @@ def main():
         show_auth_page()
         return
 
+    # One data context per rerun, shared by every page, tab and service
+    st.session_state.user_ctx = UserDataContext(db, st.session_state.user_id)
+
     # Navigation
     menu_options = [
         "🏠 Dashboard", "💬 AI Financial Coach", "💰 Budget Tracker",
@@ -179,6 +201,11 @@ def main():
         show_profile()
 
 
+def get_user_context():
+    """Data context for the logged-in user in the current rerun"""
+    return st.session_state.user_ctx
+
+
 def show_auth_page():
     st.subheader(translate_text("Welcome to SheFin",
                                 st.session_state.language))
@@ -254,19 +281,18 @@ def show_dashboard():
     st.title(translate_text("📊 Financial Dashboard",
                             st.session_state.language))
 
-    # Get user data
-    user_data = db.get_user_profile(st.session_state.user_id)
-    transactions = db.get_user_transactions(st.session_state.user_id)
-    goals = db.get_user_goals(st.session_state.user_id)
+    # Get user data (totals and rollups are aggregated in SQL)
+    user_ctx = get_user_context()
+    totals = user_ctx.transaction_totals
+    goals = user_ctx.goals
+    has_transactions = totals['income_count'] + totals['expense_count'] > 0
 
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
 
-    total_income = sum(
-        [t['amount'] for t in transactions if t['type'] == 'income'])
-    total_expenses = sum(
-        [t['amount'] for t in transactions if t['type'] == 'expense'])
-    savings = total_income - total_expenses
+    total_income = totals['income']
+    total_expenses = totals['expense']
+    savings = totals['net']
     active_goals = len([g for g in goals if g['status'] == 'active'])
 
     with col1:
@@ -311,16 +337,13 @@ def show_dashboard():
     with col1:
         st.subheader(
             translate_text("Income vs Expenses", st.session_state.language))
-        if transactions:
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
-            monthly_data = df.groupby([df['date'].dt.to_period('M'),
-                                       'type'])['amount'].sum().reset_index()
-            monthly_data['date'] = monthly_data['date'].astype(str)
+        if has_transactions:
+            monthly_data = pd.DataFrame(
+                db.get_monthly_totals(st.session_state.user_id))
 
             fig = px.bar(monthly_data,
-                         x='date',
-                         y='amount',
+                         x='month',
+                         y='total',
                          color='type',
                          title=translate_text("Monthly Income vs Expenses",
                                               st.session_state.language))
@@ -333,14 +356,12 @@ def show_dashboard():
     with col2:
         st.subheader(
             translate_text("Expense Categories", st.session_state.language))
-        if transactions:
-            expense_data = [t for t in transactions if t['type'] == 'expense']
-            if expense_data:
-                df_expenses = pd.DataFrame(expense_data)
-                category_sum = df_expenses.groupby('category')['amount'].sum()
-
-                fig = px.pie(values=category_sum.values,
-                             names=category_sum.index,
+        if has_transactions:
+            category_totals = db.get_category_totals(st.session_state.user_id,
+                                                     'expense')
+            if category_totals:
+                fig = px.pie(values=[c['total'] for c in category_totals],
+                             names=[c['category'] for c in category_totals],
                              title=translate_text("Expense Distribution",
                                                   st.session_state.language))
                 st.plotly_chart(fig, use_container_width=True)
@@ -356,10 +377,9 @@ def show_dashboard():
     # Recent transactions
     st.subheader(
         translate_text("Recent Transactions", st.session_state.language))
-    if transactions:
-        recent_transactions = sorted(transactions,
-                                     key=lambda x: x['date'],
-                                     reverse=True)[:5]
+    if has_transactions:
+        recent_transactions = db.get_user_transactions(
+            st.session_state.user_id, limit=5)
         df_recent = pd.DataFrame(recent_transactions)
         st.dataframe(df_recent, use_container_width=True)
     else:
@@ -394,40 +414,40 @@ def show_ai_coach():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Get AI response with real-time generation
+        # Stream the AI response as the model generates it
         with st.chat_message("assistant"):
-            with st.spinner(
-                    translate_text("Thinking...", st.session_state.language)):
-                # Get user context for personalized advice
-                user_data = db.get_user_profile(st.session_state.user_id)
-                transactions = db.get_user_transactions(
-                    st.session_state.user_id)
-
-                # Create placeholder for streaming response
-                response_placeholder = st.empty()
+            # Get user context for personalized advice
+            user_ctx = get_user_context()
+            user_data = user_ctx.profile
+            transactions = user_ctx.transactions
 
-                # Get response from AI
-                response = chatbot.get_financial_advice(
-                    prompt, user_data, transactions, st.session_state.language)
+            # Create placeholder for streaming response
+            response_placeholder = st.empty()
 
-                # Simulate real-time generation with streaming effect
-                displayed_text = ""
-                words = response.split()
+            # A slow model gets the rule-based answer first; its own answer
+            # is appended when it arrives
+            chunks = chatbot.stream_financial_advice(
+                prompt, user_data, transactions, st.session_state.language,
+                late_answer=True, session_id=st.session_state.user_id)
 
-                for i, word in enumerate(words):
-                    displayed_text += word + " "
-                    response_placeholder.markdown(displayed_text + "▌")
-                    time.sleep(0.05)
-
-
-# Small delay for typing effect
-
-# Final response without cursor
-                response_placeholder.markdown(response)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response
-                })
+            # Spinner only until the first chunk arrives
+            with st.spinner(
+                    translate_text("Thinking...", st.session_state.language)):
+                response = next(chunks, "")
+            # Draw it now: after a missed deadline this is the fallback
+            # answer, and the next chunk may be the model's late answer
+            response_placeholder.markdown(response + "▌")
+
+            for chunk in chunks:
+                response += chunk
+                response_placeholder.markdown(response + "▌")
+
+            # Final response without cursor
+            response_placeholder.markdown(response)
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": response
+            })
 
     # Quick action buttons
     st.subheader(
@@ -460,10 +480,11 @@ def show_budget_tracker():
     st.title(
         translate_text("💰 Smart Budget Tracker", st.session_state.language))
 
-    tab1, tab2, tab3 = st.tabs([
+    tab1, tab2, tab3, tab4 = st.tabs([
         translate_text("Add Transaction", st.session_state.language),
         translate_text("View Transactions", st.session_state.language),
-        translate_text("Budget Analysis", st.session_state.language)
+        translate_text("Budget Analysis", st.session_state.language),
+        translate_text("Import Statement", st.session_state.language)
     ])
 
     with tab1:
@@ -526,13 +547,10 @@ def show_budget_tracker():
     with tab2:
         st.subheader(
             translate_text("Transaction History", st.session_state.language))
-        transactions = db.get_user_transactions(st.session_state.user_id)
-
-        if transactions:
-            df = pd.DataFrame(transactions)
-            df = df.sort_values('date', ascending=False)
+        categories = db.get_user_categories(st.session_state.user_id)
 
-            # Filters
+        if categories:
+            # Filters (applied in SQL)
             col1, col2, col3 = st.columns(3)
             with col1:
                 type_filter = st.selectbox(
@@ -540,26 +558,16 @@ def show_budget_tracker():
                                    st.session_state.language),
                     ["All", "Income", "Expense"])
             with col2:
-                if transactions:
-                    categories = df['category'].unique().tolist()
-                    category_filter = st.selectbox(
-                        translate_text("Filter by Category",
-                                       st.session_state.language),
-                        ["All"] + categories)
+                category_filter = st.selectbox(
+                    translate_text("Filter by Category",
+                                   st.session_state.language),
+                    ["All"] + categories)
             with col3:
                 date_range = st.selectbox(
                     translate_text("Date Range", st.session_state.language),
                     ["All Time", "Last 30 Days", "Last 90 Days", "This Year"])
 
-            # Apply filters
-            filtered_df = df.copy()
-            if type_filter != "All":
-                filtered_df = filtered_df[filtered_df['type'] ==
-                                          type_filter.lower()]
-            if category_filter != "All":
-                filtered_df = filtered_df[filtered_df['category'] ==
-                                          category_filter]
-
+            start_date = None
             if date_range != "All Time":
                 today = datetime.now()
                 if date_range == "Last 30 Days":
@@ -569,10 +577,48 @@ def show_budget_tracker():
                 else:  # This Year
                     start_date = datetime(today.year, 1, 1)
 
-                filtered_df['date'] = pd.to_datetime(filtered_df['date'])
-                filtered_df = filtered_df[filtered_df['date'] >= start_date]
+            # Keyset pagination: keep the cursors of the pages visited so far
+            # and start over whenever a filter (or the logged-in user) changes
+            filters = (st.session_state.user_id, type_filter, category_filter, date_range)
+            if st.session_state.get('transaction_filters') != filters:
+                st.session_state.transaction_filters = filters
+                st.session_state.transaction_cursors = [None]
+
+            cursors = st.session_state.transaction_cursors
+            page = db.get_transactions_page(
+                st.session_state.user_id,
+                page_size=TRANSACTIONS_PAGE_SIZE,
+                cursor=cursors[-1],
+                transaction_type=None
+                if type_filter == "All" else type_filter.lower(),
+                category=None if category_filter == "All" else category_filter,
+                start_date=start_date)
+
+            if page['transactions']:
+                st.dataframe(pd.DataFrame(page['transactions']),
+                             use_container_width=True)
+            else:
+                st.info(
+                    translate_text("No transactions match these filters",
+                                   st.session_state.language))
 
-            st.dataframe(filtered_df, use_container_width=True)
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if len(cursors) > 1 and st.button(
+                        translate_text("Previous Page",
+                                       st.session_state.language)):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.caption(
+                    f"{translate_text('Page', st.session_state.language)} {len(cursors)}"
+                )
+            with col3:
+                if page['next_cursor'] and st.button(
+                        translate_text("Next Page",
+                                       st.session_state.language)):
+                    cursors.append(page['next_cursor'])
+                    st.rerun()
         else:
             st.info(
                 translate_text(
@@ -584,10 +630,11 @@ def show_budget_tracker():
             translate_text("Budget Analysis & Insights",
                            st.session_state.language))
 
-        transactions = db.get_user_transactions(st.session_state.user_id)
+        user_ctx = get_user_context()
+        transactions = user_ctx.transactions
         if transactions:
             # AI-powered budget insights
-            user_data = db.get_user_profile(st.session_state.user_id)
+            user_data = user_ctx.profile
             insights = chatbot.get_budget_insights(transactions, user_data,
                                                    st.session_state.language)
 
@@ -599,17 +646,13 @@ def show_budget_tracker():
             """,
                         unsafe_allow_html=True)
 
-            # Spending trends
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
-
             # Monthly spending trend
-            monthly_expenses = df[df['type'] == 'expense'].groupby(
-                df['date'].dt.to_period('M'))['amount'].sum()
+            monthly_expenses = db.get_monthly_totals(
+                st.session_state.user_id, transaction_type='expense')
 
             if len(monthly_expenses) > 1:
-                fig = px.line(x=monthly_expenses.index.astype(str),
-                              y=monthly_expenses.values,
+                fig = px.line(x=[m['month'] for m in monthly_expenses],
+                              y=[m['total'] for m in monthly_expenses],
                               title=translate_text("Monthly Spending Trend",
                                                    st.session_state.language))
                 st.plotly_chart(fig, use_container_width=True)
@@ -618,6 +661,43 @@ def show_budget_tracker():
                 translate_text("Add some transactions to see budget analysis",
                                st.session_state.language))
 
+    with tab4:
+        st.subheader(
+            translate_text("Import Bank Statement", st.session_state.language))
+        st.caption(
+            translate_text(
+                "Upload a CSV export with date, description and amount (or debit/credit) columns. Categories are detected automatically.",
+                st.session_state.language))
+
+        statement_file = st.file_uploader(
+            translate_text("Statement CSV", st.session_state.language),
+            type=["csv"])
+
+        if statement_file is not None and st.button(
+                translate_text("Import Transactions",
+                               st.session_state.language)):
+            progress = st.progress(0.0)
+            # Rough row estimate from file size for the progress bar
+            estimated_rows = max(1, statement_file.size // 60)
+
+            def show_progress(imported):
+                progress.progress(min(imported / estimated_rows, 1.0))
+
+            result = import_statement(db, st.session_state.user_id,
+                                      statement_file,
+                                      progress_callback=show_progress)
+            progress.progress(1.0)
+
+            if result['imported']:
+                st.success(
+                    f"{translate_text('Imported transactions', st.session_state.language)}: "
+                    f"{result['imported']:,} ({result['rows_per_minute']:,.0f}/min)")
+            if result['skipped']:
+                st.warning(
+                    f"{translate_text('Skipped rows', st.session_state.language)}: {result['skipped']:,}")
+            for error in result['errors']:
+                st.caption(error)
+
 
 def show_goal_planning():
     st.title(
@@ -629,10 +709,19 @@ def show_goal_planning():
         translate_text("Create New Goal", st.session_state.language)
     ])
 
+    user_ctx = get_user_context()
+
     with tab1:
-        goals = db.get_user_goals(st.session_state.user_id)
+        goals = user_ctx.goals
 
         if goals:
+            # Ask for every open goal's recommendation at once
+            open_goals = [g for g in goals if g['current_amount'] < g['target_amount']]
+            recommendations = dict(zip(
+                [g['id'] for g in open_goals],
+                run_async(ai_service.goal_recommendations(
+                    open_goals, user_ctx.profile, st.session_state.language))))
+
             for goal in goals:
                 progress = (goal['current_amount'] /
                             goal['target_amount']) * 100
@@ -670,10 +759,8 @@ def show_goal_planning():
                             st.rerun()
 
                 # AI recommendations for achieving goal
-                if progress < 100:
-                    recommendation = goal_planner.get_goal_recommendations(
-                        goal, st.session_state.language)
-                    st.info(f"💡 {recommendation}")
+                if goal['id'] in recommendations:
+                    st.info(f"💡 {recommendations[goal['id']]}")
 
                 st.divider()
         else:
@@ -716,12 +803,9 @@ def show_goal_planning():
                                        st.session_state.language))
 
                     # Generate AI-powered action plan
-                    user_data = db.get_user_profile(st.session_state.user_id)
-                    transactions = db.get_user_transactions(
-                        st.session_state.user_id)
                     action_plan = goal_planner.create_action_plan(
-                        goal_name, target_amount, target_date, user_data,
-                        transactions, st.session_state.language)
+                        goal_name, target_amount, target_date, user_ctx.profile,
+                        user_ctx.transactions, st.session_state.language)
 
                     st.markdown(f"""
                     <div class="feature-card">
@@ -850,8 +934,7 @@ def show_investment_guide():
             translate_text("Personalized Investment Recommendations",
                            st.session_state.language))
 
-        user_data = db.get_user_profile(st.session_state.user_id)
-        transactions = db.get_user_transactions(st.session_state.user_id)
+        user_data = get_user_context().profile
 
         col1, col2 = st.columns(2)
         with col1:
@@ -903,6 +986,12 @@ def show_investment_guide():
                 translate_text("SIP Calculator", st.session_state.language),
                 translate_text("Compound Interest", st.session_state.language),
                 translate_text("Goal-based Investment",
+                               st.session_state.language),
+                translate_text("Goal Success Probability",
+                               st.session_state.language),
+                translate_text("Loan EMI & Prepayment",
+                               st.session_state.language),
+                translate_text("Tax Regime Comparison",
                                st.session_state.language)
             ])
 
@@ -945,6 +1034,32 @@ def show_investment_guide():
                                        st.session_state.language),
                         f"₹{format_currency(result['wealth_gained'])}")
 
+                # Sensitivity: final corpus for every return rate x period
+                rates, periods = np.meshgrid(np.arange(5, 21), np.arange(1, 31))
+                grid = calculator.calculate_sip(monthly_sip, rates, periods)
+                fig = go.Figure(
+                    go.Heatmap(
+                        x=rates[0],
+                        y=periods[:, 0],
+                        z=grid['total_returns'],
+                        colorscale='Viridis',
+                        hovertemplate="%{x}% · %{y} yrs: ₹%{z:,.0f}<extra></extra>"))
+                fig.add_trace(
+                    go.Scatter(x=[annual_return],
+                               y=[years],
+                               mode='markers',
+                               marker=dict(color='white', size=10, symbol='x'),
+                               hoverinfo='skip',
+                               showlegend=False))
+                fig.update_layout(
+                    title=translate_text("Corpus by Return and Period",
+                                         st.session_state.language),
+                    xaxis_title=translate_text("Expected Annual Return (%)",
+                                               st.session_state.language),
+                    yaxis_title=translate_text("Investment Period (Years)",
+                                               st.session_state.language))
+                st.plotly_chart(fig, use_container_width=True)
+
         elif calc_type == translate_text("Compound Interest",
                                          st.session_state.language):
             col1, col2, col3 = st.columns(3)
@@ -1022,6 +1137,289 @@ def show_investment_guide():
                                        st.session_state.language),
                         f"₹{format_currency(result['target_amount'])}")
 
+        elif calc_type == translate_text("Goal Success Probability",
+                                         st.session_state.language):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                target_amount = st.number_input(translate_text(
+                    "Target Amount (₹)", st.session_state.language),
+                                                min_value=10000,
+                                                value=1000000)
+                monthly_sip = st.number_input(translate_text(
+                    "Monthly SIP Amount (₹)", st.session_state.language),
+                                              min_value=500,
+                                              value=5000)
+            with col2:
+                years = st.slider(
+                    translate_text("Time Period (Years)",
+                                   st.session_state.language), 1, 30, 10)
+                inflation_adjusted = st.checkbox(
+                    translate_text("Target is in today's prices",
+                                   st.session_state.language),
+                    value=True)
+            with col3:
+                expected_return = st.slider(
+                    translate_text("Expected Return (%)",
+                                   st.session_state.language), 5, 20, 12)
+                volatility = st.slider(
+                    translate_text("Volatility (%)",
+                                   st.session_state.language), 0, 30, 15)
+
+            if st.button(
+                    translate_text("Run Simulation",
+                                   st.session_state.language)):
+                simulation = simulate_goal(target_amount,
+                                           years * 12,
+                                           monthly_sip,
+                                           annual_return=expected_return,
+                                           volatility=volatility,
+                                           inflation_adjusted=inflation_adjusted)
+                outcomes = simulation.percentiles((10, 50, 90))
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric(
+                        translate_text("Chance of Success",
+                                       st.session_state.language),
+                        f"{simulation.success_probability():.0%}")
+                with col2:
+                    st.metric(
+                        translate_text("Median Outcome",
+                                       st.session_state.language),
+                        f"₹{format_currency(outcomes[50])}")
+                with col3:
+                    st.metric(
+                        translate_text("SIP for 90% Chance",
+                                       st.session_state.language),
+                        f"₹{format_currency(simulation.contribution_for(0.9))}")
+
+                st.caption(
+                    translate_text(
+                        f"{simulation.paths:,} simulated market paths. "
+                        f"Bad case (10th percentile): ₹{format_currency(outcomes[10])}; "
+                        f"good case (90th percentile): ₹{format_currency(outcomes[90])}",
+                        st.session_state.language))
+
+                # Leave out the top 1% so a few extreme paths don't squash the chart
+                final_values = simulation.final_values()
+                final_values = final_values[
+                    final_values <= np.percentile(final_values, 99)]
+                fig = px.histogram(x=final_values,
+                                   nbins=60,
+                                   title=translate_text(
+                                       "Distribution of Final Corpus",
+                                       st.session_state.language))
+                fig.add_vline(x=float(np.median(simulation.targets)),
+                              line_dash="dash",
+                              annotation_text=translate_text(
+                                  "Target", st.session_state.language))
+                fig.update_layout(xaxis_title="₹", yaxis_title="")
+                st.plotly_chart(fig, use_container_width=True)
+
+        elif calc_type == translate_text("Loan EMI & Prepayment",
+                                         st.session_state.language):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                loan_amount = st.number_input(translate_text(
+                    "Loan Amount (₹)", st.session_state.language),
+                                              min_value=10000,
+                                              value=2000000)
+                annual_prepayment = st.number_input(translate_text(
+                    "Yearly Prepayment (₹)", st.session_state.language),
+                                                    min_value=0,
+                                                    value=0)
+            with col2:
+                loan_rate = st.slider(
+                    translate_text("Annual Interest Rate (%)",
+                                   st.session_state.language), 1.0, 20.0,
+                    8.5, 0.25)
+                new_rate = st.slider(
+                    translate_text("Rate After Reset (%)",
+                                   st.session_state.language), 1.0, 20.0,
+                    8.5, 0.25)
+            with col3:
+                loan_years = st.slider(
+                    translate_text("Loan Tenure (Years)",
+                                   st.session_state.language), 1, 30, 20)
+                reset_year = st.slider(
+                    translate_text("Rate Reset After (Years)",
+                                   st.session_state.language), 1, 30, 5)
+
+            reduce_labels = {
+                translate_text("Shorter tenure", st.session_state.language):
+                'tenure',
+                translate_text("Lower EMI", st.session_state.language): 'emi'
+            }
+            reduce = reduce_labels[st.radio(
+                translate_text("Use prepayments for",
+                               st.session_state.language),
+                list(reduce_labels),
+                horizontal=True)]
+
+            if st.button(
+                    translate_text("Calculate EMI", st.session_state.language)):
+                rate_changes = {
+                    reset_year * 12 + 1: new_rate
+                } if new_rate != loan_rate else None
+                prepayments = {
+                    month: annual_prepayment
+                    for month in range(12, loan_years * 12 + 1, 12)
+                } if annual_prepayment else None
+                baseline = amortization_schedule(loan_amount,
+                                                 loan_rate,
+                                                 loan_years,
+                                                 rate_changes=rate_changes,
+                                                 as_array=True)
+                schedule = amortization_schedule(loan_amount,
+                                                 loan_rate,
+                                                 loan_years,
+                                                 prepayments,
+                                                 rate_changes,
+                                                 reduce,
+                                                 as_array=True)
+                baseline_totals = schedule_totals(baseline)
+                totals = schedule_totals(schedule)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric(translate_text("Monthly EMI",
+                                             st.session_state.language),
+                              f"₹{format_currency(totals['first_emi'])}")
+                with col2:
+                    st.metric(
+                        translate_text("Total Interest",
+                                       st.session_state.language),
+                        f"₹{format_currency(totals['total_interest'])}",
+                        delta=f"-₹{format_currency(baseline_totals['total_interest'] - totals['total_interest'])}"
+                        if prepayments else None,
+                        delta_color="inverse")
+                with col3:
+                    if reduce == 'emi' and prepayments:
+                        st.metric(
+                            translate_text("EMI After Prepayments",
+                                           st.session_state.language),
+                            f"₹{format_currency(totals['final_emi'])}")
+                    else:
+                        st.metric(
+                            translate_text("Loan Closes In",
+                                           st.session_state.language),
+                            f"{totals['months'] // 12}y {totals['months'] % 12}m")
+
+                fig = go.Figure()
+                fig.add_trace(
+                    go.Scatter(x=baseline['month'],
+                               y=baseline['balance'],
+                               name=translate_text(
+                                   "Without prepayment",
+                                   st.session_state.language)))
+                if prepayments:
+                    fig.add_trace(
+                        go.Scatter(x=schedule['month'],
+                                   y=schedule['balance'],
+                                   name=translate_text(
+                                       "With prepayment",
+                                       st.session_state.language)))
+                fig.update_layout(
+                    title=translate_text("Outstanding Balance",
+                                         st.session_state.language),
+                    xaxis_title=translate_text("Month",
+                                               st.session_state.language),
+                    yaxis_title="₹")
+                st.plotly_chart(fig, use_container_width=True)
+
+                with st.expander(
+                        translate_text("Yearly Schedule",
+                                       st.session_state.language)):
+                    yearly = pd.DataFrame(schedule).assign(
+                        year=lambda df: (df['month'] - 1) // 12 + 1).groupby(
+                            'year').agg(emi_paid=('emi', 'sum'),
+                                        interest=('interest', 'sum'),
+                                        principal=('principal', 'sum'),
+                                        prepayment=('prepayment', 'sum'),
+                                        balance=('balance', 'last'))
+                    st.dataframe(yearly.round(0), use_container_width=True)
+
+        elif calc_type == translate_text("Tax Regime Comparison",
+                                         st.session_state.language):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                annual_income = st.number_input(translate_text(
+                    "Annual Income (₹)", st.session_state.language),
+                                                min_value=0,
+                                                value=1200000,
+                                                step=50000)
+                tax_year = st.selectbox(
+                    translate_text("Financial Year", st.session_state.language),
+                    list(TAX_RULES),
+                    index=list(TAX_RULES).index(DEFAULT_YEAR))
+            with col2:
+                section_80c = st.number_input(translate_text(
+                    "80C Investments (₹)", st.session_state.language),
+                                              min_value=0,
+                                              value=150000)
+                section_80d = st.number_input(translate_text(
+                    "Health Insurance 80D (₹)", st.session_state.language),
+                                              min_value=0,
+                                              value=25000)
+            with col3:
+                home_loan_interest = st.number_input(translate_text(
+                    "Home Loan Interest (₹)", st.session_state.language),
+                                                     min_value=0,
+                                                     value=0)
+
+            if st.button(
+                    translate_text("Compare Regimes",
+                                   st.session_state.language)):
+                claimed = {
+                    'section_80c': section_80c,
+                    'section_80d': section_80d,
+                    'home_loan_interest': home_loan_interest
+                }
+                # The user's income plus a curve of incomes, in one pass
+                incomes = np.append(np.arange(0, 5000001, 25000),
+                                    annual_income)
+                comparison = compare_regimes(incomes, tax_year, **claimed)
+                old_tax = comparison['old_regime_tax'][-1]
+                new_tax = comparison['new_regime_tax'][-1]
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric(
+                        translate_text("Old Regime Tax",
+                                       st.session_state.language),
+                        f"₹{format_currency(old_tax)}")
+                with col2:
+                    st.metric(
+                        translate_text("New Regime Tax",
+                                       st.session_state.language),
+                        f"₹{format_currency(new_tax)}")
+                with col3:
+                    st.metric(
+                        translate_text("Better Regime",
+                                       st.session_state.language),
+                        translate_text(
+                            "Old" if comparison['better_regime'][-1] == 'old'
+                            else "New", st.session_state.language),
+                        delta=f"₹{format_currency(abs(old_tax - new_tax))} "
+                        + translate_text("saved", st.session_state.language))
+
+                fig = go.Figure()
+                for key, label in (('old_regime_tax', "Old regime"),
+                                   ('new_regime_tax', "New regime")):
+                    fig.add_trace(
+                        go.Scatter(x=incomes[:-1],
+                                   y=comparison[key][:-1],
+                                   name=translate_text(
+                                       label, st.session_state.language)))
+                fig.add_vline(x=annual_income, line_dash="dash")
+                fig.update_layout(
+                    title=translate_text("Tax by Income (with your deductions)",
+                                         st.session_state.language),
+                    xaxis_title=translate_text("Annual Income (₹)",
+                                               st.session_state.language),
+                    yaxis_title="₹")
+                st.plotly_chart(fig, use_container_width=True)
+
 
 def show_education_modules():
     st.title(
@@ -1095,6 +1493,7 @@ def show_education_modules():
         # Track learning progress
         db.track_learning_progress(st.session_state.user_id, selected_module,
                                    level)
+        get_user_context().invalidate('learning_progress')
 
     with tab2:
         st.subheader(
@@ -1156,7 +1555,7 @@ def show_education_modules():
     # Learning progress
     st.subheader(
         translate_text("Your Learning Progress", st.session_state.language))
-    progress = db.get_learning_progress(st.session_state.user_id)
+    progress = get_user_context().learning_progress
 
     if progress:
         df_progress = pd.DataFrame(progress)
@@ -1180,7 +1579,7 @@ def show_government_schemes():
         translate_text("🏛️ Government Financial Schemes for Women",
                        st.session_state.language))
 
-    user_data = db.get_user_profile(st.session_state.user_id)
+    user_data = get_user_context().profile
     schemes = get_schemes_for_user(user_data)
 
     st.subheader(
@@ -1224,8 +1623,9 @@ def show_credit_score():
             "This is a simulated credit score based on your financial behavior patterns",
             st.session_state.language))
 
-    user_data = db.get_user_profile(st.session_state.user_id)
-    transactions = db.get_user_transactions(st.session_state.user_id)
+    user_ctx = get_user_context()
+    user_data = user_ctx.profile
+    transactions = user_ctx.transactions
 
     # Calculate simulated credit score
     credit_score = credit_scorer.calculate_score(user_data, transactions)
@@ -1278,7 +1678,8 @@ def show_credit_score():
 def show_profile():
     st.title(translate_text("👤 User Profile", st.session_state.language))
 
-    user_data = db.get_user_profile(st.session_state.user_id)
+    user_ctx = get_user_context()
+    user_data = user_ctx.profile
 
     tab1, tab2 = st.tabs([
         translate_text("Profile Information", st.session_state.language),
@@ -1325,23 +1726,20 @@ def show_profile():
             translate_text("Your Financial Journey",
                            st.session_state.language))
 
-        transactions = db.get_user_transactions(st.session_state.user_id)
-        goals = db.get_user_goals(st.session_state.user_id)
-        learning_progress = db.get_learning_progress(st.session_state.user_id)
-
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric(
                 translate_text("Total Transactions",
-                               st.session_state.language), len(transactions))
+                               st.session_state.language),
+                user_ctx.transaction_count)
         with col2:
             st.metric(
                 translate_text("Active Goals", st.session_state.language),
-                len(goals))
+                len(user_ctx.goals))
         with col3:
             st.metric(
                 translate_text("Modules Completed", st.session_state.language),
-                len(learning_progress))
+                len(user_ctx.learning_progress))
 
     with tab2:
         st.subheader(translate_text("App Settings", st.session_state.language))
@@ -1364,14 +1762,10 @@ def show_profile():
         if st.button(
                 translate_text("Export My Data", st.session_state.language)):
             user_data = {
-                'profile':
-                db.get_user_profile(st.session_state.user_id),
-                'transactions':
-                db.get_user_transactions(st.session_state.user_id),
-                'goals':
-                db.get_user_goals(st.session_state.user_id),
-                'learning_progress':
-                db.get_learning_progress(st.session_state.user_id)
+                'profile': user_ctx.profile,
+                'transactions': user_ctx.transactions,
+                'goals': user_ctx.goals,
+                'learning_progress': user_ctx.learning_progress
             }
 
             json_data = json.dumps(user_data, indent=2, default=str)
@@ -0,0 +1,111 @@
+"""
+Benchmarks for SheFin's hot paths
+Run: python benchmarks.py [intent] [retirement]
+"""
+
+import argparse
+import time
+
+
+def _per_call_us(fn, items, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - start) / (repeat * len(items)) * 1e6
+
+
+def bench_intent(folds=5):
+    """Keyword matcher vs the TF-IDF model vs both combined (what
+    classify_intent does): cross-validated accuracy and per-query latency."""
+    from intent_matcher import MODEL_MIN_CONFIDENCE, keyword_intent
+    from intent_model import IntentModel, load_examples
+
+    examples = load_examples()
+    correct = {'keyword': 0, 'model': 0, 'combined': 0}
+    latency = {name: 0.0 for name in correct}
+    fixed = []
+    train_seconds = 0.0
+
+    for fold in range(folds):
+        test = examples[fold::folds]
+        train = [e for i, e in enumerate(examples) if i % folds != fold]
+        started = time.perf_counter()
+        model = IntentModel.train(train)
+        train_seconds += time.perf_counter() - started
+
+        def combined(query):
+            intent, confidence = model.classify(query)
+            return intent if confidence >= MODEL_MIN_CONFIDENCE else keyword_intent(query)
+
+        classifiers = {
+            'keyword': keyword_intent,
+            'model': lambda query: model.classify(query)[0],
+            'combined': combined,
+        }
+        queries = [query for _, query in test]
+        for name, classify in classifiers.items():
+            correct[name] += sum(classify(query) == intent for intent, query in test)
+            latency[name] += _per_call_us(classify, queries) / folds
+        fixed += [(query, keyword_intent(query), intent) for intent, query in test
+                  if keyword_intent(query) != intent and combined(query) == intent]
+
+    print(f"Intent classification: {len(examples)} labelled queries, {folds}-fold cross-validation "
+          f"(model trains in {train_seconds / folds:.2f}s)")
+    for name in correct:
+        print(f"  {name:8s} accuracy {correct[name] / len(examples):6.1%}   {latency[name]:7.1f} us/query")
+    for query, got, intent in fixed[:5]:
+        print(f"  fixed: '{query}' keyword={got} -> {intent}")
+
+
+def bench_retirement(scenarios=1_000_000, checked=20_000, seed=7):
+    """Closed-form vectorized retirement corpus vs the year-by-year loop:
+    agreement on random scenarios and throughput for a large sweep."""
+    import numpy as np
+    from financial_calculator import FinancialCalculator, retirement_corpus_loop
+
+    rng = np.random.default_rng(seed)
+    current_age = rng.integers(20, 50, scenarios)
+    inputs = {
+        'current_age': current_age,
+        'retirement_age': current_age + rng.integers(5, 35, scenarios),
+        'monthly_expenses': rng.uniform(10_000, 200_000, scenarios),
+        'inflation_rate': rng.uniform(2, 10, scenarios),
+        'retirement_years': rng.integers(10, 40, scenarios),
+        'post_retirement_return': rng.uniform(2, 10, scenarios),
+    }
+    # Include the inflation == return case, where the closed form degenerates
+    inputs['post_retirement_return'][:100] = inputs['inflation_rate'][:100]
+    calculator = FinancialCalculator()
+
+    started = time.perf_counter()
+    corpus = calculator.calculate_retirement_corpus(**inputs)['total_corpus_needed']
+    vectorized = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reference = np.array([retirement_corpus_loop(*(values[i].item() for values in inputs.values()))
+                          for i in range(checked)])
+    loop = time.perf_counter() - started
+    error = np.max(np.abs(corpus[:checked] - reference) / reference)
+
+    print(f"Retirement corpus: {scenarios:,} scenarios vectorized in {vectorized * 1e3:.0f} ms "
+          f"({vectorized / scenarios * 1e9:.0f} ns/scenario); loop {loop / checked * 1e6:.1f} us/scenario "
+          f"(~{loop / checked * scenarios:.0f}s for the sweep)")
+    print(f"  max relative difference vs loop over {checked:,} scenarios: {error:.2e}")
+
+
+BENCHMARKS = {
+    'intent': bench_intent,
+    'retirement': bench_retirement,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run SheFin benchmarks")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
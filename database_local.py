@@ -1,22 +1,484 @@
 import sqlite3
 import hashlib
 import os
+import re
+import threading
+import time
+import atexit
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import json
+from query_cache import UncachedResult, get_user_cache, cached_user_read
+
+
+# Tuning profile applied to every SQLite database the app opens. WAL lets
+# readers proceed while a writer commits; busy_timeout makes concurrent
+# writers queue for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',      # durable at checkpoints; safe with WAL
+    'cache_size': -16000,         # negative = KiB, ~16 MB page cache
+    'mmap_size': 134217728,       # 128 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,         # ms to wait on a locked database
+    'wal_autocheckpoint': 1000,   # pages
+}
+
+# Settings stored in the database file itself rather than per connection
+# (wal_autocheckpoint is per connection, so every pooled connection sets it)
+PERSISTENT_PRAGMAS = ('journal_mode',)
+
+
+def build_pragma_profile(overrides=None):
+    """Merge overrides (e.g. {'synchronous': 'FULL'}) into the default profile"""
+    profile = dict(SQLITE_PRAGMAS)
+    if overrides:
+        profile.update(overrides)
+    return profile
+
+
+def apply_pragmas(conn, pragmas, persistent=False):
+    """Apply per-connection pragmas; persistent=True also sets the file-level ones"""
+    for name, value in pragmas.items():
+        if name in PERSISTENT_PRAGMAS and not persistent:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+# Composite indexes for the per-user access paths. The transaction, goal,
+# learning and mood indexes carry every selected column so those reads are
+# answered from the index alone, already in ORDER BY order.
+TABLE_INDEXES = {
+    'idx_transactions_user_date': (
+        'CREATE INDEX idx_transactions_user_date ON transactions '
+        '(user_id, date, created_at, id, type, amount, category, description)'
+    ),
+    'idx_goals_user_created': (
+        'CREATE INDEX idx_goals_user_created ON goals '
+        '(user_id, created_at, name, target_amount, current_amount, target_date, category)'
+    ),
+    'idx_learning_progress_user_completed': (
+        'CREATE INDEX idx_learning_progress_user_completed ON learning_progress '
+        '(user_id, completed_at, module_name, level)'
+    ),
+    # message/response are too large to duplicate into the index
+    'idx_chat_history_user_created': (
+        'CREATE INDEX idx_chat_history_user_created ON chat_history (user_id, created_at)'
+    ),
+}
+
+USER_TRANSACTIONS_SQL = '''
+    SELECT id, type, amount, category, description, date, created_at
+    FROM transactions 
+    WHERE user_id = ?
+    ORDER BY date DESC, created_at DESC, id DESC
+'''
+
+BULK_INSERT_SQL = '''
+    INSERT INTO transactions (user_id, type, amount, category, description, date)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Keyset page: {where} adds filters and the (date, created_at, id) cursor
+TRANSACTIONS_PAGE_SQL = '''
+    SELECT id, type, amount, category, description, date, created_at
+    FROM transactions
+    WHERE {where}
+    ORDER BY date DESC, created_at DESC, id DESC
+    LIMIT ?
+'''
+
+USER_GOALS_SQL = '''
+    SELECT id, name, target_amount, current_amount, target_date, category, created_at
+    FROM goals 
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+'''
+
+LEARNING_PROGRESS_SQL = '''
+    SELECT module_name, level, completed_at
+    FROM learning_progress 
+    WHERE user_id = ?
+    ORDER BY completed_at DESC
+'''
+
+CHAT_HISTORY_SQL = '''
+    SELECT message, response, created_at
+    FROM chat_history 
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+'''
+
+# Keep monthly_summary in step with every insert, update and delete on
+# transactions so monthly charts read O(months) rows.
+SUMMARY_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO monthly_summary (user_id, month, type, category, total, count)
+        VALUES (NEW.user_id, substr(NEW.date, 1, 7), NEW.type, NEW.category, NEW.amount, 1)
+        ON CONFLICT (user_id, month, type, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE monthly_summary
+        SET total = total - OLD.amount, count = count - 1
+        WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+          AND type = OLD.type AND category = OLD.category;
+        DELETE FROM monthly_summary
+        WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+          AND type = OLD.type AND category = OLD.category AND count <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_update
+    AFTER UPDATE OF user_id, type, amount, category, date ON transactions
+    BEGIN
+        UPDATE monthly_summary
+        SET total = total - OLD.amount, count = count - 1
+        WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+          AND type = OLD.type AND category = OLD.category;
+        DELETE FROM monthly_summary
+        WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+          AND type = OLD.type AND category = OLD.category AND count <= 0;
+        INSERT INTO monthly_summary (user_id, month, type, category, total, count)
+        VALUES (NEW.user_id, substr(NEW.date, 1, 7), NEW.type, NEW.category, NEW.amount, 1)
+        ON CONFLICT (user_id, month, type, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END
+    ''',
+)
+
+# Queries covered by get_index_report(), with sample parameters for EXPLAIN
+ACCESS_PATHS = {
+    'get_user_transactions': (USER_TRANSACTIONS_SQL, (1,)),
+    'get_transactions_page': (
+        TRANSACTIONS_PAGE_SQL.format(where='user_id = ? AND (date, created_at, id) < (?, ?, ?)'),
+        (1, '2100-01-01', '2100-01-01 00:00:00', 0, 50)
+    ),
+    'get_user_goals': (USER_GOALS_SQL, (1,)),
+    'get_learning_progress': (LEARNING_PROGRESS_SQL, (1,)),
+    'get_chat_history': (CHAT_HISTORY_SQL, (1, 10)),
+}
+
+
+def _transaction_from_row(row):
+    """Map a transactions SELECT row to the dict shape the app uses"""
+    return {
+        'id': row[0],
+        'type': row[1],
+        'amount': row[2],
+        'category': row[3],
+        'description': row[4],
+        'date': row[5],
+        'created_at': row[6]
+    }
+
+
+def _as_date_str(value):
+    """Normalize a date/datetime/string to the YYYY-MM-DD form stored in the DB"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return str(value)[:10]
+
+
+def _is_month_end(value):
+    """True if the date is the last day of its month"""
+    day = datetime.strptime(_as_date_str(value), '%Y-%m-%d')
+    return (day + timedelta(days=1)).day == 1
+
+
+def _normalize_sql(sql):
+    return ' '.join(sql.split()).lower()
+
+
+def verify_indexes(conn, indexes):
+    """Report each expected index as 'ok', 'missing' or 'outdated'"""
+    existing = dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    ).fetchall())
+    status = {}
+    for name, sql in indexes.items():
+        if name not in existing:
+            status[name] = 'missing'
+        elif _normalize_sql(existing[name]) != _normalize_sql(sql):
+            status[name] = 'outdated'
+        else:
+            status[name] = 'ok'
+    return status
+
+
+def ensure_indexes(conn, indexes):
+    """Create missing indexes and rebuild outdated ones; returns the names changed"""
+    changed = []
+    for name, state in verify_indexes(conn, indexes).items():
+        if state == 'ok':
+            continue
+        if state == 'outdated':
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute(indexes[name])
+        changed.append(name)
+    if changed:
+        # Refresh planner statistics for the new indexes
+        conn.execute("PRAGMA optimize")
+    conn.commit()
+    return changed
+
+
+def explain_query_plan(conn, sql, params=()):
+    """Summarize EXPLAIN QUERY PLAN: indexes used, full scans, temp sorts"""
+    details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    indexes = []
+    full_scans = []
+    for detail in details:
+        match = re.search(r'USING (?:COVERING )?INDEX (\w+)', detail)
+        if match:
+            indexes.append(match.group(1))
+        elif detail.startswith('SCAN ') and 'USING' not in detail:
+            full_scans.append(detail[5:].split()[0])
+    return {
+        'plan': details,
+        'indexes': indexes,
+        'covering': any('COVERING INDEX' in d for d in details),
+        'full_scans': full_scans,
+        'temp_sort': any('TEMP B-TREE' in d for d in details)
+    }
+
+
+def index_usage_report(conn, access_paths):
+    """EXPLAIN every named query in access_paths"""
+    return {
+        name: explain_query_plan(conn, sql, params)
+        for name, (sql, params) in access_paths.items()
+    }
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection owned by a ConnectionPool; close() hands it back to the pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def close_physical(self):
+        """Really close the underlying SQLite handle"""
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections.
+
+    A thread gets the same connection back for nested get_connection() calls
+    until it releases the outermost one; released connections go to an idle
+    list and are reused by whichever session thread asks next, so Streamlit
+    reruns stop paying a connect/teardown cycle per query.
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=30.0, health_check_interval=60.0, pragmas=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = build_pragma_profile(pragmas)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._local = threading.local()
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        busy_timeout = self.pragmas.get('busy_timeout', 5000) / 1000
+        conn = sqlite3.connect(self.db_path, timeout=busy_timeout,
+                               check_same_thread=False, factory=PooledConnection)
+        apply_pragmas(conn, self.pragmas)
+        conn.pool = self
+        return conn
+
+    def configure_database(self, conn):
+        """Set file-level pragmas (WAL journal etc.); run once at schema setup"""
+        apply_pragmas(conn, self.pragmas, persistent=True)
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Check out a connection for the calling thread"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    if self._is_healthy(conn):
+                        break
+                    self._open -= 1
+                    conn.close_physical()
+                    continue
+                if self._open < self.max_size:
+                    conn = self._connect()
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Timed out waiting for a database connection ({self.max_size} in use)")
+                self._cond.wait(remaining)
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection; only the outermost release puts it back to idle"""
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+
+        # Never hand a half-finished transaction to the next session
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+        conn.last_used = time.monotonic()
+
+        with self._cond:
+            if self._closed:
+                self._open -= 1
+                conn.close_physical()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Checked-out connection that is released when the block exits"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Close idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close_physical()
+                self._open -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """Current pool occupancy"""
+        with self._cond:
+            return {
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'max_size': self.max_size
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path, max_size=8, pragmas=None):
+    """Get the process-wide pool for a database file, creating it on first use.
+
+    Size and pragma overrides only take effect for the caller that creates the pool.
+    """
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path, max_size=max_size, pragmas=pragmas)
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    """Shut down every connection pool (runs at interpreter exit)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
 
 class LocalDatabaseManager:
-    def __init__(self, db_path="shefin_local.db"):
+    def __init__(self, db_path="shefin_local.db", pool_size=8, pragmas=None):
         self.db_path = db_path
+        self.pool = get_connection_pool(db_path, max_size=pool_size, pragmas=pragmas)
+        # Per-user reads are cached across reruns until that user writes
+        self.cache = get_user_cache(db_path)
         self.init_database()
         print(f"Local SQLite database initialized: {db_path}")
     
     def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        """Get a pooled database connection; call close() to return it"""
+        return self.pool.acquire()
+
+    @contextmanager
+    def connection(self):
+        """Pooled connection that is returned to the pool even if the block raises"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close all pooled connections for this database"""
+        self.pool.close_all()
     
     def init_database(self):
         """Initialize the database with required tables"""
-        conn = self.get_connection()
+        with self.connection() as conn:
+            self.pool.configure_database(conn)
+            self._create_tables(conn)
+            ensure_indexes(conn, TABLE_INDEXES)
+
+    def verify_indexes(self):
+        """Check that every expected index exists with its current definition"""
+        with self.connection() as conn:
+            return verify_indexes(conn, TABLE_INDEXES)
+
+    def get_index_report(self):
+        """Show which index (if any) each per-user query is using"""
+        with self.connection() as conn:
+            return index_usage_report(conn, ACCESS_PATHS)
+
+    def _create_tables(self, conn):
+        """Create application tables if they don't exist"""
         cursor = conn.cursor()
         
         # Users table
@@ -102,8 +564,58 @@ class LocalDatabaseManager:
             )
         ''')
         
+        # Per-user monthly rollup of transactions, kept current by triggers
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS monthly_summary (
+                user_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                type TEXT NOT NULL,
+                category TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, month, type, category)
+            ) WITHOUT ROWID
+        ''')
+        
+        for trigger_sql in SUMMARY_TRIGGERS:
+            cursor.execute(trigger_sql)
+        
+        # Backfill once for databases created before the summary existed
+        summary_empty = cursor.execute('SELECT 1 FROM monthly_summary LIMIT 1').fetchone() is None
+        has_transactions = cursor.execute('SELECT 1 FROM transactions LIMIT 1').fetchone() is not None
+        if summary_empty and has_transactions:
+            self._rebuild_monthly_summary(conn)
+        
         conn.commit()
-        conn.close()
+
+    def _rebuild_monthly_summary(self, conn, user_id=None):
+        """Recompute monthly_summary rows from transactions inside conn's transaction"""
+        where = 'WHERE user_id = ?' if user_id is not None else ''
+        params = (user_id,) if user_id is not None else ()
+        conn.execute(f'DELETE FROM monthly_summary {where}', params)
+        cursor = conn.execute(f'''
+            INSERT INTO monthly_summary (user_id, month, type, category, total, count)
+            SELECT user_id, substr(date, 1, 7), type, category, SUM(amount), COUNT(*)
+            FROM transactions
+            {where}
+            GROUP BY user_id, substr(date, 1, 7), type, category
+        ''', params)
+        return cursor.rowcount
+
+    def rebuild_monthly_summary(self, user_id=None):
+        """Repair monthly_summary from the transactions table (one user or everyone)"""
+        try:
+            with self.connection() as conn:
+                rows = self._rebuild_monthly_summary(conn, user_id)
+                conn.commit()
+                if user_id is None:
+                    self.cache.clear()
+                else:
+                    self.cache.bump(user_id)
+                return rows
+        except Exception as e:
+            print(f"Error rebuilding monthly summary: {e}")
+            return None
     
     def hash_password(self, password):
         """Hash password using SHA-256"""
@@ -112,20 +624,19 @@ class LocalDatabaseManager:
     def create_user(self, name, email, age, monthly_income, password):
         """Create a new user"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            password_hash = self.hash_password(password)
+                password_hash = self.hash_password(password)
             
-            cursor.execute('''
-                INSERT INTO users (name, email, age, monthly_income, password_hash)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, email, age, monthly_income, password_hash))
+                cursor.execute('''
+                    INSERT INTO users (name, email, age, monthly_income, password_hash)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (name, email, age, monthly_income, password_hash))
             
-            user_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            return user_id
+                user_id = cursor.lastrowid
+                conn.commit()
+                return user_id
         except sqlite3.IntegrityError:
             return None
         except Exception as e:
@@ -135,76 +646,86 @@ class LocalDatabaseManager:
     def authenticate_user(self, email, password):
         """Authenticate user login"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            password_hash = self.hash_password(password)
+                password_hash = self.hash_password(password)
             
-            cursor.execute('''
-                SELECT id, name, email, age, monthly_income
-                FROM users 
-                WHERE email = ? AND password_hash = ?
-            ''', (email, password_hash))
+                cursor.execute('''
+                    SELECT id, name, email, age, monthly_income
+                    FROM users 
+                    WHERE email = ? AND password_hash = ?
+                ''', (email, password_hash))
             
-            user = cursor.fetchone()
-            conn.close()
+                user = cursor.fetchone()
             
-            if user:
-                return {
-                    'id': user[0],
-                    'name': user[1],
-                    'email': user[2],
-                    'age': user[3],
-                    'monthly_income': user[4]
-                }
-            return None
+                if user:
+                    return {
+                        'id': user[0],
+                        'name': user[1],
+                        'email': user[2],
+                        'age': user[3],
+                        'monthly_income': user[4]
+                    }
+                return None
         except Exception as e:
             print(f"Error authenticating user: {e}")
             return None
     
+    @cached_user_read
     def get_user_profile(self, user_id):
         """Get user profile information"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT id, name, email, age, monthly_income
-                FROM users 
-                WHERE id = ?
-            ''', (user_id,))
+                cursor.execute('''
+                    SELECT id, name, email, age, monthly_income
+                    FROM users 
+                    WHERE id = ?
+                ''', (user_id,))
             
-            user = cursor.fetchone()
-            conn.close()
+                user = cursor.fetchone()
             
-            if user:
-                return {
-                    'id': user[0],
-                    'name': user[1],
-                    'email': user[2],
-                    'age': user[3],
-                    'monthly_income': user[4]
-                }
-            return None
+                if user:
+                    return {
+                        'id': user[0],
+                        'name': user[1],
+                        'email': user[2],
+                        'age': user[3],
+                        'monthly_income': user[4]
+                    }
+                return None
         except Exception as e:
             print(f"Error getting user profile: {e}")
             return None
     
+    def get_all_user_incomes(self):
+        """Monthly income of every user, by user id (for bulk reports)"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, monthly_income FROM users ORDER BY id')
+                return dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Error getting user incomes: {e}")
+            return {}
+
     def update_user_profile(self, user_id, name, age, monthly_income):
         """Update user profile"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                UPDATE users 
-                SET name = ?, age = ?, monthly_income = ?
-                WHERE id = ?
-            ''', (name, age, monthly_income, user_id))
+                cursor.execute('''
+                    UPDATE users 
+                    SET name = ?, age = ?, monthly_income = ?
+                    WHERE id = ?
+                ''', (name, age, monthly_income, user_id))
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                self.cache.bump(user_id)
+                return True
         except Exception as e:
             print(f"Error updating user profile: {e}")
             return False
@@ -212,126 +733,331 @@ class LocalDatabaseManager:
     def add_transaction(self, user_id, transaction_type, amount, category, description, date):
         """Add a new transaction"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO transactions (user_id, type, amount, category, description, date)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, transaction_type, amount, category, description, date))
+                cursor.execute('''
+                    INSERT INTO transactions (user_id, type, amount, category, description, date)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user_id, transaction_type, amount, category, description, date))
             
-            transaction_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            return transaction_id
+                transaction_id = cursor.lastrowid
+                conn.commit()
+                self.cache.bump(user_id)
+                return transaction_id
         except Exception as e:
             print(f"Error adding transaction: {e}")
             return None
     
+    @cached_user_read
     def get_user_transactions(self, user_id, limit=None):
         """Get user transactions"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            query = '''
-                SELECT id, type, amount, category, description, date, created_at
-                FROM transactions 
-                WHERE user_id = ?
-                ORDER BY date DESC, created_at DESC
-            '''
+                query = USER_TRANSACTIONS_SQL
+                params = (user_id,)
             
-            if limit:
-                query += f' LIMIT {limit}'
+                if limit:
+                    query += ' LIMIT ?'
+                    params = (user_id, int(limit))
             
-            cursor.execute(query, (user_id,))
-            rows = cursor.fetchall()
-            conn.close()
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
             
-            transactions = []
-            for row in rows:
-                transactions.append({
-                    'id': row[0],
-                    'type': row[1],
-                    'amount': row[2],
-                    'category': row[3],
-                    'description': row[4],
-                    'date': row[5],
-                    'created_at': row[6]
-                })
-            
-            return transactions
+                return [_transaction_from_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting transactions: {e}")
-            return []
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
+    
+    def bulk_import_transactions(self, user_id, rows, chunk_size=5000, progress_callback=None):
+        """Insert many (type, amount, category, description, date) rows at once.
+
+        rows may be any iterable (e.g. a streaming parser); it is consumed in
+        chunks with executemany inside a single transaction, so either the whole
+        import lands or none of it does. progress_callback(imported) is called
+        after every chunk.
+        """
+        started = time.monotonic()
+        imported = 0
+        try:
+            with self.connection() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    chunk = []
+                    for row in rows:
+                        chunk.append((user_id,) + tuple(row))
+                        if len(chunk) >= chunk_size:
+                            conn.executemany(BULK_INSERT_SQL, chunk)
+                            imported += len(chunk)
+                            chunk = []
+                            if progress_callback:
+                                progress_callback(imported)
+                    if chunk:
+                        conn.executemany(BULK_INSERT_SQL, chunk)
+                        imported += len(chunk)
+                        if progress_callback:
+                            progress_callback(imported)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    self.cache.bump(user_id)
+        except Exception as e:
+            print(f"Error importing transactions: {e}")
+            return {'imported': 0, 'seconds': time.monotonic() - started, 'errors': [str(e)]}
+
+        seconds = time.monotonic() - started
+        return {
+            'imported': imported,
+            'seconds': seconds,
+            'rows_per_minute': imported / seconds * 60 if seconds > 0 else imported,
+            'errors': []
+        }
+
+    @cached_user_read
+    def get_transactions_page(self, user_id, page_size=50, cursor=None, transaction_type=None,
+                              category=None, start_date=None, end_date=None):
+        """One page of transactions, newest first, using keyset pagination.
+
+        cursor is the 'next_cursor' of the previous page: a (date, created_at, id)
+        tuple. Each page is an index range seek, so deep pages cost the same as
+        the first one.
+        """
+        try:
+            where, params = self._date_filter(user_id, start_date, end_date, transaction_type)
+            if category:
+                where += ' AND category = ?'
+                params.append(category)
+            if cursor:
+                where += ' AND (date, created_at, id) < (?, ?, ?)'
+                params.extend(cursor)
+            # Fetch one extra row to learn whether another page exists
+            params.append(int(page_size) + 1)
+            
+            with self.connection() as conn:
+                rows = conn.execute(TRANSACTIONS_PAGE_SQL.format(where=where), params).fetchall()
+            
+            transactions = [_transaction_from_row(row) for row in rows[:page_size]]
+            next_cursor = None
+            if len(rows) > page_size:
+                last = transactions[-1]
+                next_cursor = (last['date'], last['created_at'], last['id'])
+            
+            return {'transactions': transactions, 'next_cursor': next_cursor}
+        except Exception as e:
+            print(f"Error getting transactions page: {e}")
+            # Not cached, so the next rerun retries the query
+            return UncachedResult({'transactions': [], 'next_cursor': None})
+
+    @cached_user_read
+    def get_user_categories(self, user_id, transaction_type=None):
+        """Distinct categories a user has transactions in"""
+        try:
+            where = 'user_id = ?'
+            params = [user_id]
+            if transaction_type:
+                where += ' AND type = ?'
+                params.append(transaction_type)
+            with self.connection() as conn:
+                rows = conn.execute(
+                    f'SELECT DISTINCT category FROM monthly_summary WHERE {where} ORDER BY category',
+                    params).fetchall()
+            return [row[0] for row in rows]
+        except Exception as e:
+            print(f"Error getting categories: {e}")
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
+
+    def _date_filter(self, user_id, start_date=None, end_date=None, transaction_type=None):
+        """WHERE clause and params for a user's transactions in an optional window"""
+        clauses = ['user_id = ?']
+        params = [user_id]
+        if transaction_type:
+            clauses.append('type = ?')
+            params.append(transaction_type)
+        if start_date:
+            clauses.append('date >= ?')
+            params.append(_as_date_str(start_date))
+        if end_date:
+            clauses.append('date <= ?')
+            params.append(_as_date_str(end_date))
+        return ' AND '.join(clauses), params
+
+    def _summary_filter(self, user_id, start_date=None, end_date=None, transaction_type=None):
+        """WHERE clause over monthly_summary, or None if the window splits a month"""
+        if start_date and not _as_date_str(start_date).endswith('-01'):
+            return None
+        if end_date and not _is_month_end(end_date):
+            return None
+        clauses = ['user_id = ?']
+        params = [user_id]
+        if transaction_type:
+            clauses.append('type = ?')
+            params.append(transaction_type)
+        if start_date:
+            clauses.append('month >= ?')
+            params.append(_as_date_str(start_date)[:7])
+        if end_date:
+            clauses.append('month <= ?')
+            params.append(_as_date_str(end_date)[:7])
+        return ' AND '.join(clauses), params
+
+    def _aggregate_source(self, user_id, start_date=None, end_date=None, transaction_type=None):
+        """Pick monthly_summary when the window is whole months, else raw transactions.
+
+        Returns (table, where, params, sum_expr, count_expr, month_expr).
+        """
+        summary = self._summary_filter(user_id, start_date, end_date, transaction_type)
+        if summary is not None:
+            where, params = summary
+            return 'monthly_summary', where, params, 'SUM(total)', 'SUM(count)', 'month'
+        where, params = self._date_filter(user_id, start_date, end_date, transaction_type)
+        return 'transactions', where, params, 'SUM(amount)', 'COUNT(*)', 'substr(date, 1, 7)'
+
+    @cached_user_read
+    def get_transaction_totals(self, user_id, start_date=None, end_date=None):
+        """Income/expense totals and counts, summed in SQL"""
+        totals = {'income': 0.0, 'expense': 0.0, 'income_count': 0, 'expense_count': 0}
+        try:
+            table, where, params, sum_expr, count_expr, _ = self._aggregate_source(
+                user_id, start_date, end_date)
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT type, {sum_expr}, {count_expr}
+                    FROM {table}
+                    WHERE {where}
+                    GROUP BY type
+                ''', params).fetchall()
+            
+            for transaction_type, total, count in rows:
+                totals[transaction_type] = total or 0.0
+                totals[f'{transaction_type}_count'] = count
+        except Exception as e:
+            print(f"Error getting transaction totals: {e}")
+            totals['net'] = 0.0
+            # Not cached, so the next rerun retries the query
+            return UncachedResult(totals)
+        
+        totals['net'] = totals['income'] - totals['expense']
+        return totals
+
+    @cached_user_read
+    def get_monthly_totals(self, user_id, start_date=None, end_date=None, transaction_type=None):
+        """Per-month totals by type, oldest month first"""
+        try:
+            table, where, params, sum_expr, count_expr, month_expr = self._aggregate_source(
+                user_id, start_date, end_date, transaction_type)
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT {month_expr} AS month, type, {sum_expr}, {count_expr}
+                    FROM {table}
+                    WHERE {where}
+                    GROUP BY month, type
+                    ORDER BY month
+                ''', params).fetchall()
+            
+            return [
+                {'month': row[0], 'type': row[1], 'total': row[2], 'count': row[3]}
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"Error getting monthly totals: {e}")
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
+
+    @cached_user_read
+    def get_category_totals(self, user_id, transaction_type='expense', start_date=None, end_date=None):
+        """Per-category totals for one transaction type, largest first"""
+        try:
+            table, where, params, sum_expr, count_expr, _ = self._aggregate_source(
+                user_id, start_date, end_date, transaction_type)
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT category, {sum_expr} AS total, {count_expr}
+                    FROM {table}
+                    WHERE {where}
+                    GROUP BY category
+                    ORDER BY total DESC
+                ''', params).fetchall()
+            
+            return [
+                {'category': row[0], 'total': row[1], 'count': row[2]}
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"Error getting category totals: {e}")
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
     
     def create_goal(self, user_id, name, target_amount, target_date, current_amount, category):
         """Create a new financial goal"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO goals (user_id, name, target_amount, target_date, current_amount, category)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, name, target_amount, target_date, current_amount, category))
+                cursor.execute('''
+                    INSERT INTO goals (user_id, name, target_amount, target_date, current_amount, category)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user_id, name, target_amount, target_date, current_amount, category))
             
-            goal_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            return goal_id
+                goal_id = cursor.lastrowid
+                conn.commit()
+                self.cache.bump(user_id)
+                return goal_id
         except Exception as e:
             print(f"Error creating goal: {e}")
             return None
     
+    @cached_user_read
     def get_user_goals(self, user_id):
         """Get user financial goals"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT id, name, target_amount, current_amount, target_date, category, created_at
-                FROM goals 
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-            ''', (user_id,))
+                cursor.execute(USER_GOALS_SQL, (user_id,))
             
-            rows = cursor.fetchall()
-            conn.close()
+                rows = cursor.fetchall()
+            
+                goals = []
+                for row in rows:
+                    goals.append({
+                        'id': row[0],
+                        'name': row[1],
+                        'target_amount': row[2],
+                        'current_amount': row[3],
+                        'target_date': row[4],
+                        'category': row[5],
+                        'created_at': row[6]
+                    })
             
-            goals = []
-            for row in rows:
-                goals.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'target_amount': row[2],
-                    'current_amount': row[3],
-                    'target_date': row[4],
-                    'category': row[5],
-                    'created_at': row[6]
-                })
-            
-            return goals
+                return goals
         except Exception as e:
             print(f"Error getting goals: {e}")
-            return []
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
     
     def update_goal_progress(self, goal_id, new_amount):
         """Update goal progress"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                UPDATE goals 
-                SET current_amount = ?
-                WHERE id = ?
-            ''', (new_amount, goal_id))
+                cursor.execute('''
+                    UPDATE goals 
+                    SET current_amount = ?
+                    WHERE id = ?
+                ''', (new_amount, goal_id))
+                owner = cursor.execute('SELECT user_id FROM goals WHERE id = ?', (goal_id,)).fetchone()
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                if owner:
+                    self.cache.bump(owner[0])
+                return True
         except Exception as e:
             print(f"Error updating goal progress: {e}")
             return False
@@ -339,94 +1065,106 @@ class LocalDatabaseManager:
     def track_learning_progress(self, user_id, module_name, level):
         """Track user's learning progress"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO learning_progress (user_id, module_name, level)
-                VALUES (?, ?, ?)
-            ''', (user_id, module_name, level))
+                cursor.execute('''
+                    INSERT INTO learning_progress (user_id, module_name, level)
+                    VALUES (?, ?, ?)
+                ''', (user_id, module_name, level))
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                self.cache.bump(user_id)
+                return True
         except Exception as e:
             print(f"Error tracking learning progress: {e}")
             return False
     
+    @cached_user_read
     def get_learning_progress(self, user_id):
         """Get user's learning progress"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT module_name, level, completed_at
-                FROM learning_progress 
-                WHERE user_id = ?
-                ORDER BY completed_at DESC
-            ''', (user_id,))
+                cursor.execute(LEARNING_PROGRESS_SQL, (user_id,))
             
-            rows = cursor.fetchall()
-            conn.close()
+                rows = cursor.fetchall()
             
-            progress = []
-            for row in rows:
-                progress.append({
-                    'module_name': row[0],
-                    'level': row[1],
-                    'completed_at': row[2]
-                })
+                progress = []
+                for row in rows:
+                    progress.append({
+                        'module_name': row[0],
+                        'level': row[1],
+                        'completed_at': row[2]
+                    })
             
-            return progress
+                return progress
         except Exception as e:
             print(f"Error getting learning progress: {e}")
-            return []
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
     
     def save_chat_history(self, user_id, message, response):
         """Save chat conversation"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO chat_history (user_id, message, response)
-                VALUES (?, ?, ?)
-            ''', (user_id, message, response))
+                cursor.execute('''
+                    INSERT INTO chat_history (user_id, message, response)
+                    VALUES (?, ?, ?)
+                ''', (user_id, message, response))
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                self.cache.bump(user_id)
+                return True
         except Exception as e:
             print(f"Error saving chat history: {e}")
             return False
     
+    @cached_user_read
     def get_chat_history(self, user_id, limit=10):
         """Get recent chat history"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT message, response, created_at
-                FROM chat_history 
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+            
+                cursor.execute(CHAT_HISTORY_SQL, (user_id, limit))
+            
+                rows = cursor.fetchall()
             
-            history = []
-            for row in rows:
-                history.append({
-                    'message': row[0],
-                    'response': row[1],
-                    'created_at': row[2]
-                })
+                history = []
+                for row in rows:
+                    history.append({
+                        'message': row[0],
+                        'response': row[1],
+                        'created_at': row[2]
+                    })
             
-            return list(reversed(history))  # Return in chronological order
+                return list(reversed(history))  # Return in chronological order
         except Exception as e:
             print(f"Error getting chat history: {e}")
-            return []
\ No newline at end of file
+            # Not cached, so the next rerun retries the query
+            return UncachedResult([])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SheFin local database maintenance")
+    parser.add_argument("--db", default="shefin_local.db", help="SQLite database path")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="recompute monthly_summary from transactions "
+                             "(restart a running app afterwards; its read cache is per process)")
+    parser.add_argument("--user-id", type=int, help="limit the rebuild to one user")
+    args = parser.parse_args()
+
+    manager = LocalDatabaseManager(args.db)
+    if args.rebuild_summary:
+        rows = manager.rebuild_monthly_summary(args.user_id)
+        print(f"monthly_summary rebuilt: {rows} rows")
+        # The read cache is per process; a running app keeps its cached reads
+        print("Restart any running SheFin app so it stops serving cached totals")
+    else:
+        parser.print_help()
@@ -1,26 +1,73 @@
 import math
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from tax_engine import DEFAULT_YEAR, get_regime
+
+
+def _floats(*values):
+    return [np.asarray(v, dtype=np.float64) for v in values]
+
+
+def _unwrap(value):
+    """Plain Python value for 0-d results, so scalar callers get the same types as before"""
+    return np.asarray(value).item() if np.ndim(value) == 0 else value
+
+
+def _check_years(years):
+    """Scalar tenures must be positive (arrays are left to produce inf / nan)"""
+    if np.ndim(years) == 0 and years <= 0:
+        raise ValueError("years must be greater than zero")
+
+
+def _annuity_factor(monthly_rate, total_months):
+    """((1 + r)^n - 1) / r, or n where r == 0; works elementwise on arrays"""
+    safe_rate = np.where(monthly_rate != 0, monthly_rate, 1.0)
+    factor = (np.power(1 + monthly_rate, total_months) - 1) / safe_rate
+    return np.where(monthly_rate != 0, factor, total_months)
+
+
+def retirement_corpus_loop(current_age, retirement_age, monthly_expenses, inflation_rate=6,
+                           retirement_years=25, post_retirement_return=4):
+    """Year-by-year reference for calculate_retirement_corpus's total_corpus_needed"""
+    years_to_retirement = retirement_age - current_age
+    future_monthly_expenses = monthly_expenses * (1 + inflation_rate / 100) ** years_to_retirement
+    total_corpus_needed = 0
+    for year in range(retirement_years):
+        annual_expenses = future_monthly_expenses * 12 * (1 + inflation_rate / 100) ** year
+        # Discount back to the retirement date
+        total_corpus_needed += annual_expenses / (1 + post_retirement_return / 100) ** year
+    return total_corpus_needed
+
+
 class FinancialCalculator:
+    """Investment and loan calculators.
+
+    calculate_sip, calculate_compound_interest, calculate_goal_based_investment,
+    calculate_retirement_corpus and calculate_emi also accept NumPy arrays
+    (broadcast against each other, e.g. a rate x years meshgrid) and then
+    return arrays of results.
+    """
+
     def calculate_sip(self, monthly_amount, annual_return_rate, years):
         """Calculate SIP (Systematic Investment Plan) returns"""
-        monthly_rate = annual_return_rate / (12 * 100)
-        total_months = years * 12
+        amount, rate, period = _floats(monthly_amount, annual_return_rate, years)
+        monthly_rate = rate / (12 * 100)
+        total_months = period * 12
         
-        # Future Value of SIP formula
-        if monthly_rate > 0:
-            future_value = monthly_amount * (((1 + monthly_rate) ** total_months - 1) / monthly_rate) * (1 + monthly_rate)
-        else:
-            future_value = monthly_amount * total_months
+        # Future Value of SIP formula (payments at the start of each month)
+        future_value = amount * _annuity_factor(monthly_rate, total_months) * (1 + monthly_rate)
         
-        total_investment = monthly_amount * total_months
+        # From the inputs as given, so whole-rupee amounts stay integers
+        total_investment = np.multiply(monthly_amount, np.multiply(years, 12))
         total_returns = future_value
         wealth_gained = future_value - total_investment
         
         return {
-            'total_investment': total_investment,
-            'total_returns': total_returns,
-            'wealth_gained': wealth_gained,
+            'total_investment': _unwrap(total_investment),
+            'total_returns': _unwrap(total_returns),
+            'wealth_gained': _unwrap(wealth_gained),
             'monthly_amount': monthly_amount,
             'years': years,
             'annual_return': annual_return_rate
@@ -28,81 +75,85 @@ class FinancialCalculator:
     
     def calculate_compound_interest(self, principal, annual_rate, years, compounding_frequency=1):
         """Calculate compound interest"""
-        amount = principal * (1 + annual_rate / (100 * compounding_frequency)) ** (compounding_frequency * years)
-        interest = amount - principal
+        amount, rate, period, frequency = _floats(principal, annual_rate, years, compounding_frequency)
+        final_amount = amount * np.power(1 + rate / (100 * frequency), frequency * period)
+        interest = final_amount - amount
         
         return {
             'principal': principal,
-            'final_amount': amount,
-            'interest_earned': interest,
+            'final_amount': _unwrap(final_amount),
+            'interest_earned': _unwrap(interest),
             'annual_rate': annual_rate,
             'years': years
         }
     
     def calculate_goal_based_investment(self, target_amount, years, expected_return):
         """Calculate required monthly investment for a goal"""
-        monthly_rate = expected_return / (12 * 100)
-        total_months = years * 12
-        
-        if monthly_rate > 0:
-            required_monthly = target_amount * monthly_rate / (((1 + monthly_rate) ** total_months - 1) * (1 + monthly_rate))
-        else:
-            required_monthly = target_amount / total_months
+        _check_years(years)
+        target, period, rate = _floats(target_amount, years, expected_return)
+        monthly_rate = rate / (12 * 100)
+        total_months = period * 12
         
+        required_monthly = target / (_annuity_factor(monthly_rate, total_months) * (1 + monthly_rate))
         total_investment = required_monthly * total_months
         
         return {
             'target_amount': target_amount,
-            'required_monthly': required_monthly,
-            'total_investment': total_investment,
+            'required_monthly': _unwrap(required_monthly),
+            'total_investment': _unwrap(total_investment),
             'years': years,
             'expected_return': expected_return
         }
     
-    def calculate_retirement_corpus(self, current_age, retirement_age, monthly_expenses, inflation_rate=6):
-        """Calculate retirement corpus needed"""
-        years_to_retirement = retirement_age - current_age
+    def calculate_retirement_corpus(self, current_age, retirement_age, monthly_expenses, inflation_rate=6,
+                                    retirement_years=25, post_retirement_return=4):
+        """Calculate retirement corpus needed.
+
+        The corpus is the present value, at retirement, of retirement_years of
+        expenses growing with inflation and discounted at post_retirement_return
+        (a growing annuity due, in closed form). Any argument may be a NumPy
+        array to evaluate many scenarios at once.
+        """
+        age, retire_at, expenses, inflation, horizon, discount = _floats(
+            current_age, retirement_age, monthly_expenses, inflation_rate,
+            retirement_years, post_retirement_return)
+        years_to_retirement = retire_at - age
         
         # Calculate future monthly expenses considering inflation
-        future_monthly_expenses = monthly_expenses * (1 + inflation_rate / 100) ** years_to_retirement
+        future_monthly_expenses = expenses * np.power(1 + inflation / 100, years_to_retirement)
         
-        # Assume 25 years post-retirement life
-        retirement_years = 25
-        
-        # Calculate total corpus needed (considering inflation during retirement too)
-        total_corpus_needed = 0
-        for year in range(retirement_years):
-            annual_expenses = future_monthly_expenses * 12 * (1 + inflation_rate / 100) ** year
-            # Discount back to retirement date (assuming 4% real return during retirement)
-            present_value = annual_expenses / (1 + 0.04) ** year
-            total_corpus_needed += present_value
+        # sum over year k < horizon of first-year expenses * q^k, q = (1 + inflation) / (1 + return)
+        growth = (1 + inflation / 100) / (1 + discount / 100)
+        safe_gap = np.where(growth != 1, 1 - growth, 1.0)
+        factor = np.where(growth != 1, (1 - np.power(growth, horizon)) / safe_gap, horizon)
+        total_corpus_needed = future_monthly_expenses * 12 * factor
         
         return {
             'current_age': current_age,
             'retirement_age': retirement_age,
             'current_monthly_expenses': monthly_expenses,
-            'future_monthly_expenses': future_monthly_expenses,
-            'total_corpus_needed': total_corpus_needed,
-            'years_to_save': years_to_retirement
+            'future_monthly_expenses': _unwrap(future_monthly_expenses),
+            'total_corpus_needed': _unwrap(total_corpus_needed),
+            'years_to_save': _unwrap(np.subtract(retirement_age, current_age))
         }
     
     def calculate_emi(self, principal, annual_rate, years):
         """Calculate EMI for loan"""
-        monthly_rate = annual_rate / (12 * 100)
-        total_months = years * 12
+        _check_years(years)
+        amount, rate, period = _floats(principal, annual_rate, years)
+        monthly_rate = rate / (12 * 100)
+        total_months = period * 12
         
-        if monthly_rate > 0:
-            emi = principal * monthly_rate * (1 + monthly_rate) ** total_months / ((1 + monthly_rate) ** total_months - 1)
-        else:
-            emi = principal / total_months
+        # P * r * (1+r)^n / ((1+r)^n - 1) == P * (1+r)^n / annuity factor
+        emi = amount * np.power(1 + monthly_rate, total_months) / _annuity_factor(monthly_rate, total_months)
         
         total_payment = emi * total_months
-        total_interest = total_payment - principal
+        total_interest = total_payment - amount
         
         return {
-            'emi': emi,
-            'total_payment': total_payment,
-            'total_interest': total_interest,
+            'emi': _unwrap(emi),
+            'total_payment': _unwrap(total_payment),
+            'total_interest': _unwrap(total_interest),
             'principal': principal,
             'years': years,
             'annual_rate': annual_rate
@@ -167,45 +218,38 @@ class FinancialCalculator:
             'inflation_rate': inflation_rate
         }
     
-    def calculate_tax_savings(self, annual_income, investments_80c=0, health_insurance=0, home_loan_interest=0):
-        """Calculate tax savings under various sections"""
-        # Income tax slabs for FY 2023-24 (New Regime)
-        tax_slabs = [
-            (300000, 0),      # Up to 3L - 0%
-            (600000, 5),      # 3L to 6L - 5%
-            (900000, 10),     # 6L to 9L - 10%
-            (1200000, 15),    # 9L to 12L - 15%
-            (1500000, 20),    # 12L to 15L - 20%
-            (float('inf'), 30) # Above 15L - 30%
-        ]
-        
-        def calculate_tax(income):
-            tax = 0
-            prev_limit = 0
-            for limit, rate in tax_slabs:
-                if income > prev_limit:
-                    taxable_in_slab = min(income, limit) - prev_limit
-                    tax += taxable_in_slab * rate / 100
-                    prev_limit = limit
-                else:
-                    break
-            return tax
-        
-        # Tax without deductions
-        tax_without_deductions = calculate_tax(annual_income)
-        
-        # Tax with deductions
-        total_deductions = min(investments_80c, 150000) + min(health_insurance, 25000)
-        taxable_income = max(annual_income - total_deductions - home_loan_interest, 0)
-        tax_with_deductions = calculate_tax(taxable_income)
-        
-        tax_saved = tax_without_deductions - tax_with_deductions
+    def calculate_tax_savings(self, annual_income, investments_80c=0, health_insurance=0, home_loan_interest=0,
+                              tax_year=DEFAULT_YEAR):
+        """Calculate tax savings under various sections.
+
+        Deductions only count under the old regime, so the savings compare old
+        regime tax with and without them; the new regime tax is returned too,
+        with whichever regime is cheaper. Accepts arrays like the other
+        calculators.
+        """
+        claimed = {
+            'section_80c': investments_80c,
+            'section_80d': health_insurance,
+            'home_loan_interest': home_loan_interest,
+        }
+        old_regime = get_regime('old', tax_year)
+        tax_without_deductions = old_regime.tax(annual_income)
+        with_deductions = old_regime.compute(annual_income, **claimed)
+        tax_with_deductions = with_deductions['total_tax']
+        new_regime_tax = get_regime('new', tax_year).tax(annual_income)
+        
+        income = np.asarray(annual_income, dtype=np.float64)
+        safe_income = np.where(income > 0, income, 1.0)
+        effective_tax_rate = np.where(income > 0, tax_with_deductions / safe_income * 100, 0.0)
         
         return {
             'annual_income': annual_income,
-            'tax_without_deductions': tax_without_deductions,
-            'tax_with_deductions': tax_with_deductions,
-            'tax_saved': tax_saved,
-            'total_deductions': total_deductions,
-            'effective_tax_rate': (tax_with_deductions / annual_income) * 100 if annual_income > 0 else 0
+            'tax_year': tax_year,
+            'tax_without_deductions': _unwrap(tax_without_deductions),
+            'tax_with_deductions': _unwrap(tax_with_deductions),
+            'tax_saved': _unwrap(tax_without_deductions - tax_with_deductions),
+            'total_deductions': _unwrap(old_regime.allowed_deductions(**claimed)),
+            'effective_tax_rate': _unwrap(effective_tax_rate),
+            'new_regime_tax': _unwrap(new_regime_tax),
+            'better_regime': _unwrap(np.where(tax_with_deductions < new_regime_tax, 'old', 'new'))
         }
@@ -1,30 +1,221 @@
 import os
 import logging
+import threading
+from typing import Iterator
 from dotenv import load_dotenv
-import os
+from prompt_context import fit_to_budget
+from ai_resilience import ResilientCaller, ServiceUnavailableError, caller_from_env, is_retryable
+from ai_cache import AIResponseCache, SingleFlight, get_response_cache
 
 
-def get_financial_advice(prompt: str) -> str:
-    """Get financial advice from Gemini AI"""
-    try:
-        # Import here to avoid issues if package not available
-        import google.generativeai as genai
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+
+class GeminiConfigurationError(RuntimeError):
+    """GEMINI_API_KEY is not set"""
+
+
+class GeminiClient:
+    """Long-lived Gemini client shared by every prompt in the process.
+
+    The SDK is imported, configured and the model constructed once, on first
+    use; after that a request costs only the network call. Settings default to
+    the GEMINI_MODEL / GEMINI_TIMEOUT environment variables; GEMINI_API_ENDPOINT
+    points the client at another host over REST.
+    """
+
+    def __init__(self, model_name=None, timeout=None, generation_config=None):
         load_dotenv()  # Loads variables from .env
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            return "AI service temporarily unavailable. Please check your API configuration."
-            
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        
-        return response.text or "I'm here to help with your financial questions!"
-    except ImportError:
-        logging.error("Google Generative AI package not available")
-        return "AI service temporarily unavailable. Using fallback responses."
+        self.model_name = model_name or os.environ.get("GEMINI_MODEL", DEFAULT_MODEL)
+        self.timeout = timeout if timeout is not None else float(os.environ.get("GEMINI_TIMEOUT", "30"))
+        self.generation_config = generation_config
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Import here to avoid issues if package not available
+                    import google.generativeai as genai
+                    api_key = os.environ.get("GEMINI_API_KEY")
+                    if not api_key:
+                        raise GeminiConfigurationError("GEMINI_API_KEY is not set")
+                    endpoint = os.environ.get("GEMINI_API_ENDPOINT")
+                    if endpoint:
+                        # e.g. a local stub server for testing failure handling
+                        genai.configure(api_key=api_key, transport="rest",
+                                        client_options={"api_endpoint": endpoint})
+                    else:
+                        genai.configure(api_key=api_key)
+                    self._model = genai.GenerativeModel(self.model_name,
+                                                        generation_config=self.generation_config)
+        return self._model
+
+    def _request_options(self):
+        # Retries are handled by the shared resilience layer, not per request
+        return {"timeout": self.timeout, "retry": None}
+
+    def generate(self, prompt: str) -> str:
+        """Return the full response text for a prompt"""
+        response = self._get_model().generate_content(
+            prompt, request_options=self._request_options())
+        return response.text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield response text chunks as the model produces them"""
+        response = self._get_model().generate_content(
+            prompt, stream=True, request_options=self._request_options())
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata only)
+                continue
+            if text:
+                yield text
+
+
+_client = None
+_guard = None
+_client_lock = threading.Lock()
+
+# Identical prompts in flight at the same time share one model request
+_in_flight = SingleFlight()
+
+
+def get_gemini_client() -> GeminiClient:
+    """Process-wide GeminiClient, created lazily"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient()
+    return _client
+
+
+def configure_gemini_client(model_name=None, timeout=None, generation_config=None) -> GeminiClient:
+    """Replace the shared client, e.g. to change model or generation settings"""
+    global _client
+    with _client_lock:
+        _client = GeminiClient(model_name, timeout, generation_config)
+    return _client
+
+
+def _get_cache():
+    """Shared response cache, or None if it can't be opened"""
+    try:
+        return get_response_cache()
     except Exception as e:
-        logging.error(f"Gemini AI error: {e}")
-        return "I'm currently having trouble connecting to provide personalized advice. Please try again."
+        logging.error(f"AI response cache unavailable: {e}")
+        return None
+
+
+def get_gemini_guard() -> ResilientCaller:
+    """Process-wide rate limiter / retry / circuit breaker for Gemini calls"""
+    global _guard
+    if _guard is None:
+        with _client_lock:
+            if _guard is None:
+                _guard = caller_from_env(ignore=(GeminiConfigurationError, ImportError))
+    return _guard
+
+
+def _start_stream(client, prompt):
+    """Open a stream and wait for its first chunk, so failures surface inside the guard"""
+    chunks = client.stream(prompt)
+    return next(chunks, None), chunks
+
+
+def _request_key(client, prompt, language):
+    return AIResponseCache.make_key(prompt, client.model_name, language)
+
+
+def cached_advice(prompt: str, language: str = 'english'):
+    """Cached model answer for prompt, or None; never calls the model"""
+    client = get_gemini_client()
+    cache = _get_cache()
+    if cache is None:
+        return None
+    return cache.get(_request_key(client, prompt, language))
+
+
+def generate_advice(prompt: str, language: str = 'english') -> str:
+    """Model answer for prompt, from the cache when possible.
+
+    Concurrent calls for the same prompt share one in-flight model request.
+    Raises ServiceUnavailableError (circuit open, rate limited or retries
+    exhausted), GeminiConfigurationError or ImportError instead of returning
+    an apology, so callers can route to the fallback advisor.
+    """
+    client = get_gemini_client()
+    cache = _get_cache()
+    key = _request_key(client, prompt, language)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    def load():
+        response = get_gemini_guard().call(client.generate, prompt)
+        if response and cache:
+            cache.put(key, response, client.model_name, language)
+        return response
+
+    return _in_flight.do(key, load)
+
+
+def stream_advice(prompt: str, language: str = 'english') -> Iterator[str]:
+    """Yield model answer chunks (a cached answer in one piece); raises like generate_advice.
+
+    If the same prompt is already being answered, wait for that answer and
+    yield it whole rather than starting a second model request.
+    """
+    client = get_gemini_client()
+    cache = _get_cache()
+    key = _request_key(client, prompt, language)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    call, leader = _in_flight.begin(key)
+    if not leader:
+        response = SingleFlight.wait(call)
+        if response:
+            yield response
+        return
+
+    chunks = []
+    error = None
+    try:
+        guard = get_gemini_guard()
+        first, rest = guard.call(_start_stream, client, prompt)
+        if first is None:
+            return
+
+        chunks.append(first)
+        yield first
+        try:
+            for text in rest:
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            if is_retryable(e):
+                guard.breaker.record_failure()
+            raise ServiceUnavailableError(str(e)) from e
+
+        if cache:
+            cache.put(key, ''.join(chunks), client.model_name, language)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if isinstance(error, GeneratorExit):
+            # Our consumer stopped early; waiters can't get a complete answer
+            error = ServiceUnavailableError("stream abandoned")
+        _in_flight.finish(key, call, ''.join(chunks), error)
 
 
 def analyze_budget(transactions_data: str, user_context: str) -> str:
@@ -32,8 +223,8 @@ def analyze_budget(transactions_data: str, user_context: str) -> str:
     prompt = f"""
     You are SheFin, an AI financial advisor for women in India. Analyze this financial data and provide specific, actionable advice.
     
-    User Context: {user_context}
-    Transaction Data: {transactions_data}
+    User Context: {fit_to_budget(user_context)}
+    Transaction Data: {fit_to_budget(transactions_data)}
     
     Please provide:
     1. Budget analysis with key insights
@@ -44,7 +235,7 @@ def analyze_budget(transactions_data: str, user_context: str) -> str:
     Keep the response encouraging and practical.
     """
     
-    return get_financial_advice(prompt)
+    return generate_advice(prompt)
 
 
 def get_investment_guidance(user_profile: str, goal: str) -> str:
@@ -52,8 +243,8 @@ def get_investment_guidance(user_profile: str, goal: str) -> str:
     prompt = f"""
     You are SheFin, an AI financial advisor specializing in helping Indian women achieve their financial goals.
     
-    User Profile: {user_profile}
-    Financial Goal: {goal}
+    User Profile: {fit_to_budget(user_profile)}
+    Financial Goal: {fit_to_budget(goal, 100)}
     
     Provide specific investment advice including:
     1. Suitable investment options (SIP, PPF, mutual funds, etc.)
@@ -65,7 +256,7 @@ def get_investment_guidance(user_profile: str, goal: str) -> str:
     Focus on options available in India and be encouraging about women's financial independence.
     """
     
-    return get_financial_advice(prompt)
+    return generate_advice(prompt)
 
 
 def get_government_scheme_advice(user_data: str) -> str:
@@ -73,7 +264,7 @@ def get_government_scheme_advice(user_data: str) -> str:
     prompt = f"""
     You are SheFin, an AI advisor helping Indian women access government financial schemes.
     
-    User Information: {user_data}
+    User Information: {fit_to_budget(user_data)}
     
     Recommend relevant government schemes such as:
     - Sukanya Samriddhi Yojana
@@ -91,4 +282,4 @@ def get_government_scheme_advice(user_data: str) -> str:
     Be specific about which schemes best match this user's profile.
     """
     
-    return get_financial_advice(prompt)
\ No newline at end of file
+    return generate_advice(prompt)
\ No newline at end of file
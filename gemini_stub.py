@@ -0,0 +1,183 @@
+"""
+Local stub of the Gemini REST API for exercising the resilience layer
+Answers generateContent / streamGenerateContent with a fixed text, or with a
+scripted sequence of HTTP errors. Point the app at it with
+GEMINI_API_ENDPOINT=http://127.0.0.1:8765 (any GEMINI_API_KEY works).
+
+Serve:       python gemini_stub.py [--port 8765] [--fail 503 --fail-count 3]
+Self-check:  python gemini_stub.py --check   (retry, trip and half-open recovery)
+"""
+
+import argparse
+import http.server
+import json
+import os
+import threading
+import time
+from collections import deque
+
+STUB_ANSWER = "Stub advice: keep six months of expenses in a liquid fund and start a monthly SIP."
+
+_STATUS_NAMES = {400: 'INVALID_ARGUMENT', 429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'}
+
+
+class StubGemini:
+    """Threaded HTTP server; queued statuses are served first, then successes"""
+
+    def __init__(self, port=0, answer=STUB_ANSWER):
+        self.answer = answer
+        self.requests = 0
+        self._script = deque()
+        self._lock = threading.Lock()
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def fail(self, status, count=1):
+        """Answer the next count requests with HTTP status"""
+        with self._lock:
+            self._script.extend([status] * count)
+
+    def _next_status(self):
+        with self._lock:
+            self.requests += 1
+            return self._script.popleft() if self._script else 200
+
+    def _handler(self):
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status = stub._next_status()
+                if status != 200:
+                    body = {'error': {'code': status, 'message': 'stub failure',
+                                      'status': _STATUS_NAMES.get(status, 'UNKNOWN')}}
+                else:
+                    candidate = {'content': {'parts': [{'text': stub.answer}], 'role': 'model'},
+                                 'finishReason': 'STOP', 'index': 0}
+                    body = {'candidates': [candidate]}
+                    if ':streamGenerateContent' in self.path:
+                        body = [body]
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check():
+    """Drive GeminiClient through a ResilientCaller against the stub"""
+    from ai_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, ServiceUnavailableError
+    from gemini_ai import GeminiClient, GeminiConfigurationError
+
+    stub = StubGemini().start()
+    os.environ['GEMINI_API_ENDPOINT'] = stub.endpoint
+    os.environ.setdefault('GEMINI_API_KEY', 'stub-key')
+    client = GeminiClient(timeout=5)
+    guard = ResilientCaller(rate=100, burst=100, max_retries=2, base_delay=0.01, max_delay=0.05,
+                            failure_threshold=3, reset_timeout=0.2,
+                            ignore=(GeminiConfigurationError, ImportError))
+
+    def expect(condition, message):
+        print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            raise SystemExit(1)
+
+    try:
+        print(f"Gemini stub at {stub.endpoint}")
+        stub.fail(503, 2)
+        expect(guard.call(client.generate, "retry") == STUB_ANSWER and stub.requests == 3,
+               "two 503s are retried, the third attempt succeeds")
+
+        stub.fail(400, 5)
+        for _ in range(5):
+            try:
+                guard.call(client.generate, "bad prompt")
+            except ServiceUnavailableError:
+                pass
+        expect(guard.breaker.state == CircuitBreaker.CLOSED, "400s are not retried and do not trip the breaker")
+
+        stub.fail(503, 3)
+        try:
+            guard.call(client.generate, "outage")
+        except ServiceUnavailableError:
+            pass
+        expect(guard.breaker.state == CircuitBreaker.OPEN, "three 503s in a row open the circuit")
+        requests = stub.requests
+        try:
+            guard.call(client.generate, "while open")
+            short_circuited = False
+        except CircuitOpenError:
+            short_circuited = True
+        expect(short_circuited and stub.requests == requests, "an open circuit rejects calls without a request")
+
+        time.sleep(guard.breaker.reset_timeout)
+        stub.fail(503)
+        try:
+            guard.call(client.generate, "failed trial")
+        except ServiceUnavailableError:
+            pass
+        expect(guard.breaker.state == CircuitBreaker.OPEN, "a failed half-open trial re-opens the circuit")
+
+        time.sleep(guard.breaker.reset_timeout)
+        expect(guard.call(client.generate, "recovered") == STUB_ANSWER
+               and guard.breaker.state == CircuitBreaker.CLOSED, "a successful half-open trial closes the circuit")
+
+        def misconfigured():
+            raise GeminiConfigurationError("GEMINI_API_KEY is not set")
+
+        stub.fail(503, 3)
+        try:
+            guard.call(client.generate, "second outage")
+        except ServiceUnavailableError:
+            pass
+        time.sleep(guard.breaker.reset_timeout)
+        try:
+            guard.call(misconfigured)
+        except GeminiConfigurationError:
+            pass
+        expect(guard.call(client.generate, "after ignored") == STUB_ANSWER,
+               "an ignored error on the half-open trial lets the next call try")
+        print(f"  stats: {guard.stats()}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Gemini API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail", type=int, help="HTTP status for the first --fail-count requests, e.g. 503")
+    parser.add_argument("--fail-count", type=int, default=1)
+    parser.add_argument("--check", action="store_true", help="Run the resilience self-check and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        check()
+    else:
+        stub = StubGemini(args.port)
+        if args.fail:
+            stub.fail(args.fail, args.fail_count)
+        print(f"Gemini stub listening on {stub.endpoint} (Ctrl+C to stop)")
+        try:
+            stub.server.serve_forever()
+        except KeyboardInterrupt:
+            stub.stop()
@@ -0,0 +1,147 @@
+"""
+Keyword intent classifier shared by the rule-based advisors
+All intent keywords (English, Hindi, Tamil) are compiled once at import into
+a single regex alternation, so one scan of the query scores every intent.
+classify_intent prefers the trained model from intent_model when available.
+"""
+
+import re
+from collections import namedtuple
+
+from intent_model import get_intent_model
+
+# Below this probability the model defers to the keyword rules
+MODEL_MIN_CONFIDENCE = 0.5
+
+# Intents in priority order (earlier wins a tie), each with its keywords
+INTENT_KEYWORDS = {
+    'budget_analysis': {
+        'english': ['budget', 'spending', 'expense', 'money management', 'track'],
+        'hindi': ['बजट', 'खर्च', 'व्यय'],
+        'tamil': ['பட்ஜெட்', 'செலவு'],
+    },
+    'investment_advice': {
+        'english': ['invest', 'mutual fund', 'sip', 'share', 'stock', 'returns'],
+        'hindi': ['निवेश', 'म्यूचुअल फंड', 'शेयर'],
+        'tamil': ['முதலீடு', 'மியூச்சுவல் ஃபண்ட்', 'பங்கு'],
+    },
+    'savings_help': {
+        'english': ['save', 'saving', 'emergency fund', 'deposit', 'bank account'],
+        'hindi': ['बचत', 'आपातकालीन', 'जमा'],
+        'tamil': ['சேமிப்பு', 'சேமி', 'அவசர'],
+    },
+    'government_schemes': {
+        'english': ['government', 'scheme', 'yojana', 'loan', 'subsidy'],
+        'hindi': ['सरकार', 'योजना', 'ऋण', 'लोन', 'सब्सिडी'],
+        'tamil': ['அரசு', 'திட்டம்', 'கடன்', 'மானியம்'],
+    },
+    'goal_planning': {
+        'english': ['goal', 'target', 'plan', 'achieve', 'future'],
+        'hindi': ['लक्ष्य', 'भविष्य'],
+        'tamil': ['இலக்கு', 'எதிர்காலம்'],
+    },
+    'debt_management': {
+        'english': ['debt', 'loan', 'emi', 'credit card', 'repay'],
+        'hindi': ['कर्ज', 'क़र्ज़', 'ईएमआई', 'क्रेडिट कार्ड'],
+        'tamil': ['கடன்', 'இஎம்ஐ', 'கிரெடிட் கார்டு'],
+    },
+    'tax_planning': {
+        'english': ['tax', 'saving', '80c', 'deduction', 'rebate'],
+        'hindi': ['टैक्स', 'आयकर', 'कटौती'],
+        'tamil': ['வரி', 'கழிவு'],
+    },
+    'insurance': {
+        'english': ['insurance', 'policy', 'cover', 'protection'],
+        'hindi': ['बीमा', 'पॉलिसी'],
+        'tamil': ['காப்பீடு', 'பாலிசி'],
+    },
+    'greeting': {
+        'english': ['hello', 'hi', 'hey', 'good morning', 'good evening'],
+        'hindi': ['नमस्ते', 'नमस्कार'],
+        'tamil': ['வணக்கம்'],
+    },
+}
+
+INTENT_PRIORITY = {intent: rank for rank, intent in enumerate(INTENT_KEYWORDS)}
+
+IntentMatch = namedtuple('IntentMatch', ['intent', 'confidence', 'score', 'keywords'])
+
+
+def _keyword_pattern(keyword):
+    """Very short English keywords ('hi') must be whole words; longer ones may
+    take suffixes so 'invest' covers 'investing'."""
+    escaped = re.escape(keyword)
+    if keyword.isascii() and len(keyword) <= 2:
+        return rf'{escaped}\b'
+    return escaped
+
+
+def _build_matcher(intent_keywords):
+    """One alternation over every distinct keyword, plus keyword -> intents.
+
+    English keywords only start at a word boundary. Hindi/Tamil keywords match
+    anywhere (\b is unreliable around Indic vowel signs) but only where an
+    Indic character starts; both guards sit outside the alternation so most
+    positions are rejected without trying every keyword. There are no capture
+    groups or IGNORECASE (queries are lowercased instead); both slow the
+    alternation down several times.
+    """
+    keyword_intents = {}
+    for intent, languages in intent_keywords.items():
+        for keywords in languages.values():
+            for keyword in keywords:
+                keyword_intents.setdefault(keyword.lower(), []).append(intent)
+
+    # Longest first so 'emergency fund' is preferred over a shorter overlap
+    keywords = sorted(keyword_intents, key=len, reverse=True)
+    ascii_keywords = '|'.join(_keyword_pattern(k) for k in keywords if k.isascii())
+    indic_keywords = '|'.join(_keyword_pattern(k) for k in keywords if not k.isascii())
+
+    pattern = re.compile(rf'\b(?:{ascii_keywords})|(?=[\u0900-\u0bff])(?:{indic_keywords})')
+    return pattern, keyword_intents
+
+
+_PATTERN, _KEYWORD_INTENTS = _build_matcher(INTENT_KEYWORDS)
+
+
+def match_intents(query):
+    """All intents the query mentions, best first, as IntentMatch tuples.
+
+    Each distinct keyword found adds its word count to every intent it
+    signals (phrases count more than single words); confidence is the
+    intent's share of the total score.
+    """
+    scores = {}
+    matched = {}
+    for match in _PATTERN.finditer((query or '').lower()):
+        keyword = match.group()
+        for intent in _KEYWORD_INTENTS[keyword]:
+            found = matched.setdefault(intent, set())
+            if keyword not in found:
+                found.add(keyword)
+                scores[intent] = scores.get(intent, 0) + len(keyword.split())
+
+    total = sum(scores.values())
+    ranked = sorted(scores, key=lambda intent: (-scores[intent], INTENT_PRIORITY[intent]))
+    return [IntentMatch(intent, scores[intent] / total, scores[intent], sorted(matched[intent]))
+            for intent in ranked]
+
+
+def keyword_intent(query, default='general_advice'):
+    """Best intent by keywords alone, or default if nothing matches"""
+    matches = match_intents(query)
+    return matches[0].intent if matches else default
+
+
+def classify_intent(query, default='general_advice'):
+    """The single best intent for a query.
+
+    Uses the trained intent model when its artifact is present and it is
+    confident, otherwise the keyword rules.
+    """
+    model = get_intent_model()
+    if model is not None:
+        intent, confidence = model.classify(query)
+        if confidence >= MODEL_MIN_CONFIDENCE:
+            return intent
+    return keyword_intent(query, default)
@@ -0,0 +1,218 @@
+"""
+Local TF-IDF + logistic regression intent model
+Trained offline from a labelled query file (intent_training.tsv) and saved as
+a compact gzipped JSON artifact; loaded once at startup and used by intent_matcher
+ahead of the keyword rules when present.
+
+Train:  python intent_model.py [--data intent_training.tsv] [--out intent_model.json.gz]
+"""
+
+import argparse
+import functools
+import gzip
+import json
+import math
+import os
+import random
+import re
+import threading
+
+import numpy as np
+
+MODEL_PATH = os.environ.get("SHEFIN_INTENT_MODEL",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_model.json.gz"))
+TRAINING_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_training.tsv")
+
+# Latin words/numbers, or runs of Devanagari..Tamil (which keep their vowel signs)
+_TOKEN = re.compile(r'[a-z0-9]+|[ऀ-௿]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+@functools.lru_cache(maxsize=8192)
+def _token_features(token):
+    padded = f"<{token}>"
+    features = {f"w:{token}"}
+    for n in (3, 4):
+        features.update(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    return tuple(features)
+
+
+def extract_features(text):
+    """Word unigrams and bigrams plus character 3/4-grams of each word (which
+    cover inflections such as 'investing' or Tamil case endings), as a set of
+    feature names"""
+    tokens = tokenize(text)
+    features = {f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    for token in tokens:
+        features.update(_token_features(token))
+    return features
+
+
+def load_examples(path=TRAINING_DATA):
+    """(intent, query) pairs from a tab-separated file; '#' lines are comments"""
+    examples = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            intent, query = line.split('\t', 1)
+            examples.append((intent.strip(), query.strip()))
+    return examples
+
+
+class IntentModel:
+    """Multinomial logistic regression over L2-normalized TF-IDF features.
+
+    Training is plain SGD over sparse features (offline, a second or two);
+    prediction gathers the query's rows from a dense weight matrix.
+    """
+
+    def __init__(self, labels, idf, weights, bias):
+        self.labels = labels
+        self.idf = idf              # feature -> idf
+        self.weights = weights      # feature -> [weight per label]
+        self.bias = bias
+        # Dense matrices for vectorized prediction: feature -> row index
+        self._index = {f: i for i, f in enumerate(weights)}
+        self._idf_vector = np.array([idf[f] for f in weights], dtype=np.float64)
+        self._matrix = np.array([weights[f] for f in weights], dtype=np.float64).reshape(-1, len(labels))
+        self._bias = np.array(bias, dtype=np.float64)
+
+    def _vector(self, text):
+        features = [(f, self.idf[f]) for f in extract_features(text) if f in self.idf]
+        norm = math.sqrt(sum(v * v for _, v in features)) or 1.0
+        return [(f, v / norm) for f, v in features]
+
+    def _scores(self, vector):
+        scores = list(self.bias)
+        for feature, value in vector:
+            row = self.weights[feature]
+            for k, w in enumerate(row):
+                scores[k] += value * w
+        return scores
+
+    def _predict_probs(self, text):
+        """Class probabilities via one gather and one matrix-vector product"""
+        index = self._index
+        rows = [index[f] for f in extract_features(text) if f in index]
+        scores = self._bias
+        if rows:
+            idf = self._idf_vector[rows]
+            scores = scores + (idf / np.sqrt(idf @ idf)) @ self._matrix[rows]
+        exps = np.exp(scores - scores.max())
+        return exps / exps.sum()
+
+    @staticmethod
+    def _softmax(scores):
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, text):
+        """[(intent, probability)] best first"""
+        probs = self._predict_probs(text)
+        return sorted(zip(self.labels, probs.tolist()), key=lambda item: item[1], reverse=True)
+
+    def classify(self, text):
+        """(best intent, probability)"""
+        probs = self._predict_probs(text)
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    @classmethod
+    def train(cls, examples, epochs=40, learning_rate=0.5, l2=1e-4, min_df=1, seed=13):
+        """Fit by SGD on (intent, query) pairs; features seen in fewer than
+        min_df queries are dropped"""
+        labels = sorted({intent for intent, _ in examples})
+        label_index = {label: i for i, label in enumerate(labels)}
+
+        documents = [extract_features(query) for _, query in examples]
+        df = {}
+        for features in documents:
+            for f in features:
+                df[f] = df.get(f, 0) + 1
+        n = len(documents)
+        idf = {f: math.log((1 + n) / (1 + count)) + 1 for f, count in df.items() if count >= min_df}
+
+        model = cls(labels, idf, {f: [0.0] * len(labels) for f in idf}, [0.0] * len(labels))
+        data = [(model._vector(query), label_index[intent]) for intent, query in examples]
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for vector, target in data:
+                probs = cls._softmax(model._scores(vector))
+                probs[target] -= 1.0
+                for k, g in enumerate(probs):
+                    model.bias[k] -= rate * g
+                for feature, value in vector:
+                    row = model.weights[feature]
+                    for k, g in enumerate(probs):
+                        row[k] -= rate * (g * value + l2 * row[k])
+        # Rebuild so the prediction matrices hold the trained weights
+        return cls(labels, idf, model.weights, model.bias)
+
+    def to_dict(self, precision=3):
+        # Features whose weights all round to 0 add nothing; drop them to keep the file small
+        features = [f for f, row in self.weights.items() if max(abs(w) for w in row) >= 10 ** -precision]
+        return {
+            'version': 1,
+            'labels': self.labels,
+            'bias': [round(b, precision) for b in self.bias],
+            'features': features,
+            'idf': [round(self.idf[f], precision) for f in features],
+            'weights': [[round(w, precision) for w in self.weights[f]] for f in features],
+        }
+
+    def save(self, path=MODEL_PATH):
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        features = data['features']
+        return cls(data['labels'], dict(zip(features, data['idf'])),
+                   dict(zip(features, data['weights'])), data['bias'])
+
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_intent_model():
+    """The trained model, loaded once; None if no artifact exists (or it is unreadable)"""
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                if MODEL_PATH and os.path.exists(MODEL_PATH):
+                    try:
+                        _model = IntentModel.load(MODEL_PATH)
+                    except (OSError, EOFError, ValueError, KeyError) as e:
+                        print(f"Error loading intent model: {e}")
+                _model_loaded = True
+    return _model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local intent model")
+    parser.add_argument("--data", default=TRAINING_DATA, help="Labelled intent<TAB>query file")
+    parser.add_argument("--out", default=MODEL_PATH, help="Where to write the model artifact")
+    args = parser.parse_args()
+
+    examples = load_examples(args.data)
+    model = IntentModel.train(examples)
+    model.save(args.out)
+    correct = sum(model.classify(query)[0] == intent for intent, query in examples)
+    print(f"Trained on {len(examples)} queries, {len(model.labels)} intents; "
+          f"training accuracy {correct / len(examples):.1%}; saved {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.1f} KB)")
@@ -0,0 +1,134 @@
+"""
+Monte Carlo simulation of savings goals
+Simulates many monthly market-return paths, an inflation rate per path and
+optionally missed contributions (income breaks), then reports how likely a
+plan is to reach its target and the spread of outcomes.
+"""
+
+import math
+import os
+
+import numpy as np
+
+DEFAULT_PATHS = int(os.environ.get("SHEFIN_MC_PATHS", 20000))
+# Upper bound on paths x months simulated at once (~16 MB per float64 array)
+MAX_CELLS = int(os.environ.get("SHEFIN_MC_CELLS", 2_000_000))
+# Fixed by default so the same inputs always give the same plan
+DEFAULT_SEED = int(os.environ.get("SHEFIN_MC_SEED", 42))
+
+# (up to months, portfolio, expected annual return %, annual volatility %)
+HORIZON_PORTFOLIOS = [
+    (36, 'debt funds', 7, 3),
+    (60, 'hybrid funds', 10, 9),
+    (None, 'equity funds', 12, 16),
+]
+
+
+def portfolio_for_horizon(months):
+    """(portfolio, expected return %, volatility %) suited to a goal horizon"""
+    for limit, name, expected_return, volatility in HORIZON_PORTFOLIOS:
+        if limit is None or months <= limit:
+            return name, expected_return, volatility
+
+
+class GoalSimulation:
+    """Simulated outcomes of saving towards one goal.
+
+    The final value of each path is linear in the monthly contribution, so any
+    contribution can be evaluated (or solved for) without simulating again.
+    """
+
+    def __init__(self, initial_amount, monthly_contribution, initial_growth, contribution_growth, targets,
+                 inflation_factors):
+        self.initial_amount = initial_amount
+        self.monthly_contribution = monthly_contribution
+        self.initial_growth = initial_growth            # end value of ₹1 held from the start, per path
+        self.contribution_growth = contribution_growth  # end value of the ₹1/month contribution schedule
+        self.targets = targets                          # target per path (inflated if requested)
+        self.inflation_factors = inflation_factors
+
+    @property
+    def paths(self):
+        return len(self.targets)
+
+    def final_values(self, monthly_contribution=None):
+        if monthly_contribution is None:
+            monthly_contribution = self.monthly_contribution
+        return self.initial_amount * self.initial_growth + monthly_contribution * self.contribution_growth
+
+    def success_probability(self, monthly_contribution=None):
+        return float(np.mean(self.final_values(monthly_contribution) >= self.targets))
+
+    def percentiles(self, q=(10, 50, 90), monthly_contribution=None, real=False):
+        """{percentile: final value}; real=True deflates to today's rupees"""
+        values = self.final_values(monthly_contribution)
+        if real:
+            values = values / self.inflation_factors
+        return dict(zip(q, np.percentile(values, q).tolist()))
+
+    def contribution_for(self, probability):
+        """Smallest monthly contribution that reaches the target on at least
+        the given fraction of paths"""
+        shortfall = np.maximum(self.targets - self.initial_amount * self.initial_growth, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            needed = np.where(shortfall > 0, shortfall / self.contribution_growth, 0.0)
+        return float(np.quantile(needed, probability, method='higher'))
+
+    def summary(self, q=(10, 50, 90)):
+        final = self.final_values()
+        return {
+            'paths': self.paths,
+            'success_probability': float(np.mean(final >= self.targets)),
+            'percentiles': dict(zip(q, np.percentile(final, q).tolist())),
+            'median_target': float(np.median(self.targets)),
+            'expected_shortfall': float(np.maximum(self.targets - final, 0).mean()),
+        }
+
+
+def simulate_goal(target_amount, months, monthly_contribution, initial_amount=0, annual_return=12,
+                  volatility=15, inflation_rate=6, inflation_volatility=1.5, inflation_adjusted=True,
+                  annual_step_up=0, skip_probability=0, paths=DEFAULT_PATHS, seed=DEFAULT_SEED,
+                  max_cells=MAX_CELLS):
+    """Simulate saving monthly_contribution (at the start of each month, like
+    calculate_sip) for months towards target_amount.
+
+    Monthly returns are lognormal with the given expected annual return and
+    volatility. Each path draws its own inflation rate; with
+    inflation_adjusted the target is in today's prices and grows with it.
+    Contributions rise by annual_step_up % each year and each one is missed
+    with skip_probability. Paths are simulated in chunks of at most
+    max_cells / months so memory stays bounded for long horizons.
+    """
+    months = int(months)
+    if months < 1:
+        raise ValueError("months must be at least 1")
+    if paths < 1:
+        raise ValueError("paths must be at least 1")
+
+    rng = np.random.default_rng(seed)
+    sigma = volatility / 100 / math.sqrt(12)
+    # Drift chosen so the expected monthly growth is 1 + annual_return / 12, as in calculate_sip
+    mu = math.log1p(annual_return / (12 * 100)) - sigma ** 2 / 2
+    schedule = (1 + annual_step_up / 100) ** (np.arange(months) // 12)
+    chunk = max(1, min(paths, max_cells // months))
+
+    initial_growth = np.empty(paths)
+    contribution_growth = np.empty(paths)
+    for start in range(0, paths, chunk):
+        n = min(chunk, paths - start)
+        log_growth = rng.normal(mu, sigma, (n, months))
+        # growth[:, t] = growth from the start of month t to the end of the horizon
+        growth = np.exp(np.cumsum(log_growth[:, ::-1], axis=1)[:, ::-1])
+        initial_growth[start:start + n] = growth[:, 0]
+        if skip_probability:
+            paid = rng.random((n, months)) >= skip_probability
+            contribution_growth[start:start + n] = (growth * paid) @ schedule
+        else:
+            contribution_growth[start:start + n] = growth @ schedule
+
+    inflation = rng.normal(inflation_rate, inflation_volatility, paths)
+    inflation_factors = (1 + inflation / 100) ** (months / 12)
+    targets = target_amount * inflation_factors if inflation_adjusted else np.full(paths, float(target_amount))
+
+    return GoalSimulation(initial_amount, monthly_contribution, initial_growth, contribution_growth, targets,
+                          inflation_factors)
@@ -8,11 +8,30 @@ import os
 from datetime import datetime, timedelta
 import pandas as pd
 from translations import translate_text
+from database_local import get_connection_pool, ensure_indexes, verify_indexes, index_usage_report
+from query_cache import UncachedResult, get_user_cache, cached_user_read
+
+# Covering index for get_mood_history and get_mood_calendar_data
+MOOD_INDEXES = {
+    'idx_mood_entries_user_date': (
+        'CREATE INDEX idx_mood_entries_user_date ON mood_entries '
+        '(user_id, date, mood_type, mood_intensity, spending_trigger, notes, amount_spent)'
+    ),
+}
+
+MOOD_HISTORY_SQL = """
+    SELECT date, mood_type, mood_intensity, spending_trigger, notes, amount_spent
+    FROM mood_entries
+    WHERE user_id = ? AND date >= ?
+    ORDER BY date DESC
+"""
 
 class MoneyMoodTracker:
     def __init__(self, db_path="shefin_local.db"):
         self.db_path = db_path
         self.use_postgresql = False  # Always use SQLite for better performance
+        self.pool = get_connection_pool(db_path)
+        self.cache = get_user_cache(db_path)
         self.init_mood_tables()
         
         # Mood categories with emojis
@@ -73,60 +92,71 @@ class MoneyMoodTracker:
 
     def init_mood_tables(self):
         """Initialize mood tracking tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            self.pool.configure_database(conn)
+            cursor = conn.cursor()
         
-        # Mood entries table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS mood_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                mood_type TEXT NOT NULL,
-                mood_intensity INTEGER CHECK(mood_intensity >= 1 AND mood_intensity <= 5),
-                spending_trigger TEXT,
-                notes TEXT,
-                amount_spent REAL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
+            # Mood entries table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS mood_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    mood_type TEXT NOT NULL,
+                    mood_intensity INTEGER CHECK(mood_intensity >= 1 AND mood_intensity <= 5),
+                    spending_trigger TEXT,
+                    notes TEXT,
+                    amount_spent REAL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """)
         
-        # Mood goals table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS mood_goals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                goal_type TEXT NOT NULL,
-                target_mood TEXT NOT NULL,
-                target_frequency INTEGER DEFAULT 5,
-                current_streak INTEGER DEFAULT 0,
-                best_streak INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
+            # Mood goals table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS mood_goals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    goal_type TEXT NOT NULL,
+                    target_mood TEXT NOT NULL,
+                    target_frequency INTEGER DEFAULT 5,
+                    current_streak INTEGER DEFAULT 0,
+                    best_streak INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """)
         
-        conn.commit()
-        conn.close()
+            conn.commit()
+            ensure_indexes(conn, MOOD_INDEXES)
+
+    def verify_indexes(self):
+        """Check the mood table indexes exist with their current definition"""
+        with self.pool.connection() as conn:
+            return verify_indexes(conn, MOOD_INDEXES)
+
+    def get_index_report(self):
+        """Show which index the mood history query is using"""
+        with self.pool.connection() as conn:
+            return index_usage_report(conn, {'get_mood_history': (MOOD_HISTORY_SQL, (1, '2000-01-01'))})
 
     def log_mood(self, user_id, mood_type, mood_intensity, spending_trigger=None, notes="", amount_spent=0):
         """Log a mood entry"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
             
-            today = datetime.now().strftime('%Y-%m-%d')
+                today = datetime.now().strftime('%Y-%m-%d')
             
-            cursor.execute("""
-                INSERT INTO mood_entries 
-                (user_id, date, mood_type, mood_intensity, spending_trigger, notes, amount_spent)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, today, mood_type, mood_intensity, spending_trigger, notes, amount_spent))
+                cursor.execute("""
+                    INSERT INTO mood_entries 
+                    (user_id, date, mood_type, mood_intensity, spending_trigger, notes, amount_spent)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, today, mood_type, mood_intensity, spending_trigger, notes, amount_spent))
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                self.cache.bump(user_id)
+                return True
             
         except Exception as e:
             print(f"Error logging mood: {e}")
@@ -134,26 +164,22 @@ class MoneyMoodTracker:
 
     def get_mood_history(self, user_id, days=30):
         """Get mood history for user"""
+        thirty_days_ago = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        # The cutoff date is part of the cache key, so the window still moves daily
+        return self._load_mood_history(user_id, thirty_days_ago)
+
+    @cached_user_read
+    def _load_mood_history(self, user_id, since_date):
+        """Mood entries on or after since_date, newest first"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            thirty_days_ago = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            
-            query = """
-                SELECT date, mood_type, mood_intensity, spending_trigger, notes, amount_spent
-                FROM mood_entries
-                WHERE user_id = ? AND date >= ?
-                ORDER BY date DESC
-            """
-            
-            df = pd.read_sql_query(query, conn, params=[user_id, thirty_days_ago])
-            conn.close()
+            with self.pool.connection() as conn:
+                df = pd.read_sql_query(MOOD_HISTORY_SQL, conn, params=[user_id, since_date])
             
             return df.to_dict('records') if not df.empty else []
             
         except Exception as e:
             print(f"Error getting mood history: {e}")
-            return []
+            return UncachedResult([])
 
     def get_mood_insights(self, user_id, language='english'):
         """Generate mood insights and patterns"""
@@ -317,18 +343,18 @@ class MoneyMoodTracker:
     def set_mood_goal(self, user_id, goal_type, target_mood, target_frequency=5):
         """Set a mood improvement goal"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT OR REPLACE INTO mood_goals 
-                (user_id, goal_type, target_mood, target_frequency)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, goal_type, target_mood, target_frequency))
+                cursor.execute("""
+                    INSERT OR REPLACE INTO mood_goals 
+                    (user_id, goal_type, target_mood, target_frequency)
+                    VALUES (?, ?, ?, ?)
+                """, (user_id, goal_type, target_mood, target_frequency))
             
-            conn.commit()
-            conn.close()
-            return True
+                conn.commit()
+                self.cache.bump(user_id)
+                return True
             
         except Exception as e:
             print(f"Error setting mood goal: {e}")
@@ -342,37 +368,36 @@ class MoneyMoodTracker:
             year = datetime.now().year
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
             
-            start_date = f"{year}-{month:02d}-01"
-            if month == 12:
-                end_date = f"{year+1}-01-01"
-            else:
-                end_date = f"{year}-{month+1:02d}-01"
+                start_date = f"{year}-{month:02d}-01"
+                if month == 12:
+                    end_date = f"{year+1}-01-01"
+                else:
+                    end_date = f"{year}-{month+1:02d}-01"
             
-            cursor.execute("""
-                SELECT date, mood_type, mood_intensity
-                FROM mood_entries
-                WHERE user_id = ? AND date >= ? AND date < ?
-                ORDER BY date
-            """, (user_id, start_date, end_date))
+                cursor.execute("""
+                    SELECT date, mood_type, mood_intensity
+                    FROM mood_entries
+                    WHERE user_id = ? AND date >= ? AND date < ?
+                    ORDER BY date
+                """, (user_id, start_date, end_date))
             
-            results = cursor.fetchall()
-            conn.close()
+                results = cursor.fetchall()
             
-            # Format for calendar
-            calendar_data = {}
-            for date, mood_type, intensity in results:
-                day = int(date.split('-')[2])
-                emoji = self.mood_categories.get(mood_type, {}).get('emoji', '😐')
-                calendar_data[day] = {
-                    'emoji': emoji,
-                    'mood': mood_type,
-                    'intensity': intensity
-                }
+                # Format for calendar
+                calendar_data = {}
+                for date, mood_type, intensity in results:
+                    day = int(date.split('-')[2])
+                    emoji = self.mood_categories.get(mood_type, {}).get('emoji', '😐')
+                    calendar_data[day] = {
+                        'emoji': emoji,
+                        'mood': mood_type,
+                        'intensity': intensity
+                    }
             
-            return calendar_data
+                return calendar_data
             
         except Exception as e:
             print(f"Error getting calendar data: {e}")
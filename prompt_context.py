@@ -0,0 +1,142 @@
+"""
+Compact financial context for Gemini prompts
+Summarizes a user's transactions into a fixed-size digest (monthly totals,
+top categories, month-over-month changes, unusual transactions) that fits a
+token budget, so prompt size stays bounded however long the history is
+"""
+
+import math
+import os
+from collections import defaultdict
+
+# Default budget for the user/transaction part of a prompt
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("SHEFIN_PROMPT_TOKENS", "400"))
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for Gemini)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def fit_to_budget(text, token_budget=None):
+    """Cut free text to the token budget, ending on a whole line where possible"""
+    token_budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    max_chars = token_budget * CHARS_PER_TOKEN
+    text = str(text)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    newline = cut.rfind('\n')
+    if newline > max_chars // 2:
+        cut = cut[:newline]
+    return cut.rstrip() + "\n..."
+
+
+def _month(value):
+    return str(value)[:7]
+
+
+def _rupees(amount):
+    return f"-₹{-amount:,.0f}" if amount < 0 else f"₹{amount:,.0f}"
+
+
+def summarize_transactions(transactions, months=6, top_n=5, max_anomalies=3):
+    """Aggregate transactions into the numbers the digest reports"""
+    monthly = defaultdict(lambda: {'income': 0.0, 'expense': 0.0})
+    categories = defaultdict(float)
+    category_month = defaultdict(float)
+    stats = defaultdict(lambda: [0, 0.0, 0.0])     # category -> [count, sum, sum of squares]
+    totals = {'income': 0.0, 'expense': 0.0}
+
+    for t in transactions or []:
+        amount = float(t['amount'])
+        month = _month(t['date'])
+        monthly[month][t['type']] = monthly[month].get(t['type'], 0.0) + amount
+        totals[t['type']] = totals.get(t['type'], 0.0) + amount
+        if t['type'] == 'expense':
+            categories[t['category']] += amount
+            category_month[(t['category'], month)] += amount
+            s = stats[t['category']]
+            s[0] += 1
+            s[1] += amount
+            s[2] += amount * amount
+
+    recent_months = sorted(monthly, reverse=True)[:months]
+
+    # Month-over-month change per category between the two latest months
+    trends = []
+    if len(recent_months) >= 2:
+        latest, previous = recent_months[0], recent_months[1]
+        for category in categories:
+            delta = category_month.get((category, latest), 0.0) - category_month.get((category, previous), 0.0)
+            if delta:
+                trends.append((category, delta))
+        trends.sort(key=lambda item: abs(item[1]), reverse=True)
+
+    # Expenses far above what is usual for their category
+    thresholds = {}
+    for category, (count, total, squares) in stats.items():
+        if count >= 5:
+            mean = total / count
+            std = math.sqrt(max(squares / count - mean * mean, 0.0))
+            thresholds[category] = max(mean + 3 * std, 2 * mean)
+    anomalies = [t for t in transactions or []
+                 if t['type'] == 'expense' and t['category'] in thresholds
+                 and float(t['amount']) > thresholds[t['category']]]
+    anomalies.sort(key=lambda t: float(t['amount']), reverse=True)
+
+    return {
+        'totals': totals,
+        'count': len(transactions or []),
+        'monthly': [(month, monthly[month]) for month in recent_months],
+        'top_categories': sorted(categories.items(), key=lambda item: item[1], reverse=True)[:top_n],
+        'trends': trends[:top_n],
+        'anomalies': anomalies[:max_anomalies],
+    }
+
+
+def build_financial_digest(transactions, user_data=None, token_budget=None):
+    """Plain-text digest of a user's finances that fits within token_budget.
+
+    Sections are added in priority order (profile, totals, monthly totals,
+    top categories, trends, anomalies); lines that would overflow the budget
+    are dropped.
+    """
+    token_budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    summary = summarize_transactions(transactions)
+    totals = summary['totals']
+
+    sections = []
+    if user_data:
+        sections.append([f"Profile: {user_data.get('name', 'User')}, age {user_data.get('age', 'unknown')}, "
+                         f"monthly income {_rupees(float(user_data.get('monthly_income') or 0))}"])
+    sections.append([f"All recorded: {summary['count']} transactions, income {_rupees(totals['income'])}, "
+                     f"expenses {_rupees(totals['expense'])}, net {_rupees(totals['income'] - totals['expense'])}"])
+    if summary['monthly']:
+        sections.append(["Monthly totals (newest first):"] + [
+            f"- {month}: income {_rupees(values['income'])}, expenses {_rupees(values['expense'])}"
+            for month, values in summary['monthly']])
+    if summary['top_categories']:
+        sections.append(["Top expense categories: " + ", ".join(
+            f"{category} {_rupees(amount)}" for category, amount in summary['top_categories'])])
+    if summary['trends']:
+        sections.append(["Change vs previous month: " + ", ".join(
+            f"{category} {'+' if delta > 0 else '-'}{_rupees(abs(delta))}" for category, delta in summary['trends'])])
+    if summary['anomalies']:
+        sections.append(["Unusually large expenses:"] + [
+            f"- {t['date']} {t['category']} {_rupees(float(t['amount']))}"
+            + (f" ({t['description'][:40]})" if t.get('description') else "")
+            for t in summary['anomalies']])
+
+    lines = []
+    used = 0
+    for section in sections:
+        for line in section:
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                return "\n".join(lines)
+            lines.append(line)
+            used += cost
+    return "\n".join(lines)
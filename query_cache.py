@@ -0,0 +1,155 @@
+"""
+Write-invalidated cache for per-user database reads
+Results are tagged with the user's write version; any write for that user
+bumps the version, so cached reads survive Streamlit reruns until the
+user's data actually changes.
+
+The cache lives in one process: writes made by another process (e.g.
+`python database_local.py --rebuild-summary` while the app is running) are
+not seen until that user writes through the app or the app restarts.
+"""
+
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+# Longer lists are sized from this many evenly spaced rows, not every row
+SIZE_SAMPLE_ROWS = 16
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a query result in bytes; constant
+    time in the row count, since result rows are alike"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)) and value:
+        step = max(1, len(value) // SIZE_SAMPLE_ROWS)
+        sample = value[::step]
+        size += sum(estimate_size(item) for item in sample) * len(value) // len(sample)
+    return size
+
+
+class UncachedResult:
+    """Wrap a loader's fallback value (e.g. [] after a failed query) so it is
+    returned to the caller but never stored"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class UserReadCache:
+    """Thread-safe LRU of query results keyed by (user_id, query key).
+
+    Entries are bounded both by count and by estimated bytes. Cached values
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # (user_id, key) -> (version, value, size)
+        self._versions = {}             # user_id -> write counter
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get_or_load(self, user_id, key, loader):
+        """Return the cached result, or run loader() and cache what it returns
+        (except None and UncachedResult fallbacks)"""
+        cache_key = (user_id, key)
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        if value is None:
+            return value
+        if isinstance(value, UncachedResult):
+            return value.value
+
+        size = estimate_size(value)
+        with self._lock:
+            # A write that landed while we were loading makes this result stale
+            if self._versions.get(user_id, 0) != version or size > self.max_bytes:
+                return value
+            old = self._entries.pop(cache_key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[cache_key] = (version, value, size)
+            self._bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def bump(self, user_id):
+        """Record a write for user_id; their cached reads become stale"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            for cache_key in [k for k in self._entries if k[0] == user_id]:
+                self._bytes -= self._entries.pop(cache_key)[2]
+
+    def clear(self):
+        """Invalidate everything (e.g. after a bulk repair)"""
+        with self._lock:
+            for user_id in {k[0] for k in self._entries}:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_user_cache(db_path, max_entries=1024, max_bytes=64 * 1024 * 1024):
+    """Process-wide cache for a database file, shared by every manager using it"""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = UserReadCache(max_entries, max_bytes)
+            _caches[key] = cache
+        return cache
+
+
+def cached_user_read(method):
+    """Cache a method(self, user_id, ...) in self.cache until that user writes"""
+    @functools.wraps(method)
+    def wrapper(self, user_id, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self.cache.get_or_load(user_id, key, lambda: method(self, user_id, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,209 @@
+"""
+Bulk transaction import from CSV / bank statement exports
+Streams the file in chunks, validates and categorizes each row, and hands
+batches to LocalDatabaseManager.bulk_import_transactions
+"""
+
+import csv
+import io
+import re
+from datetime import datetime
+
+# Header aliases used by common Indian bank statement exports
+COLUMN_ALIASES = {
+    'date': ['date', 'txn date', 'transaction date', 'value date', 'posting date'],
+    'description': ['description', 'narration', 'particulars', 'details', 'remarks'],
+    'amount': ['amount', 'transaction amount', 'amt'],
+    'type': ['type', 'transaction type', 'dr/cr', 'cr/dr'],
+    'debit': ['debit', 'withdrawal', 'withdrawal amt', 'withdrawal amount', 'debit amount'],
+    'credit': ['credit', 'deposit', 'deposit amt', 'deposit amount', 'credit amount'],
+    'category': ['category'],
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d-%b-%Y', '%d %b %Y', '%d-%b-%y']
+
+# Keywords -> app categories (same names as the Budget Tracker form)
+CATEGORY_KEYWORDS = {
+    'expense': {
+        'Food': ['swiggy', 'zomato', 'restaurant', 'cafe', 'grocery', 'bigbasket', 'blinkit', 'zepto', 'dmart', 'food'],
+        'Transportation': ['uber', 'ola', 'rapido', 'metro', 'irctc', 'petrol', 'fuel', 'fastag', 'bus', 'cab'],
+        'Healthcare': ['hospital', 'pharmacy', 'apollo', 'medplus', 'clinic', 'doctor', 'medical', 'insurance'],
+        'Education': ['school', 'college', 'tuition', 'course', 'udemy', 'byju', 'fees', 'books'],
+        'Shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'nykaa', 'meesho', 'mall', 'store'],
+        'Utilities': ['electricity', 'bescom', 'water', 'gas', 'broadband', 'airtel', 'jio', 'vodafone', 'recharge', 'bill'],
+        'Entertainment': ['netflix', 'hotstar', 'prime video', 'spotify', 'bookmyshow', 'pvr', 'inox', 'movie'],
+    },
+    'income': {
+        'Salary': ['salary', 'sal ', 'payroll', 'wages'],
+        'Business': ['business', 'sales', 'invoice', 'client', 'gst'],
+        'Investment Returns': ['dividend', 'interest', 'int.pd', 'mutual fund', 'redemption', 'maturity'],
+        'Government Benefits': ['dbt', 'pm kisan', 'pension', 'scholarship', 'subsidy', 'govt'],
+    },
+}
+
+_KEYWORD_PATTERNS = {
+    transaction_type: [
+        (category, re.compile('|'.join(re.escape(k) for k in keywords)))
+        for category, keywords in categories.items()
+    ]
+    for transaction_type, categories in CATEGORY_KEYWORDS.items()
+}
+
+
+class StatementFormatError(ValueError):
+    """The file does not have the columns needed to read transactions"""
+
+
+def categorize_transaction(description, transaction_type):
+    """Guess an app category from the statement narration"""
+    text = (description or '').lower()
+    for category, pattern in _KEYWORD_PATTERNS.get(transaction_type, []):
+        if pattern.search(text):
+            return category
+    return 'Other'
+
+
+def parse_date(value):
+    """Parse a statement date into YYYY-MM-DD"""
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date '{value}'")
+
+
+_DR_CR_SUFFIX = re.compile(r'\s*(dr|cr)\.?$', re.IGNORECASE)
+
+
+def parse_amount_marker(value):
+    """Parse '1,234.50', '₹1,234.50 Dr' or '(500)' into (float, 'dr' | 'cr' | None);
+    blank -> (None, None)"""
+    text = (value or '').strip().replace(',', '').replace('₹', '').replace('INR', '').strip()
+    if not text:
+        return None, None
+    marker = None
+    suffix = _DR_CR_SUFFIX.search(text)
+    if suffix:
+        marker = suffix.group(1).lower()
+        text = text[:suffix.start()]
+    if text.startswith('(') and text.endswith(')'):
+        text = '-' + text[1:-1]
+    return float(text), marker
+
+
+def parse_amount(value):
+    """Parse '1,234.50', '₹1,234.50 Dr' or '(500)' into a float; blank -> None"""
+    return parse_amount_marker(value)[0]
+
+
+def _map_columns(header):
+    """Map our logical column names to header positions"""
+    normalized = [h.strip().lower() for h in header]
+    columns = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[name] = normalized.index(alias)
+                break
+    if 'date' not in columns:
+        raise StatementFormatError("Statement needs a date column")
+    if 'amount' not in columns and not ('debit' in columns or 'credit' in columns):
+        raise StatementFormatError("Statement needs an amount column or debit/credit columns")
+    return columns
+
+
+def _cell(row, columns, name):
+    index = columns.get(name)
+    if index is None or index >= len(row):
+        return ''
+    return row[index]
+
+
+def _parse_row(row, columns):
+    """One CSV row -> (type, amount, category, description, date)"""
+    date = parse_date(_cell(row, columns, 'date'))
+    description = _cell(row, columns, 'description').strip()
+
+    if 'debit' in columns or 'credit' in columns:
+        debit = parse_amount(_cell(row, columns, 'debit'))
+        credit = parse_amount(_cell(row, columns, 'credit'))
+        if debit:
+            transaction_type, amount = 'expense', debit
+        elif credit:
+            transaction_type, amount = 'income', credit
+        else:
+            raise ValueError("no debit or credit amount")
+    else:
+        amount, suffix = parse_amount_marker(_cell(row, columns, 'amount'))
+        if amount is None:
+            raise ValueError("missing amount")
+        # A type column wins; otherwise a 'Dr' / 'Cr' suffix on the amount itself
+        marker = _cell(row, columns, 'type').strip().lower() or suffix
+        if marker in ('income', 'credit', 'cr', 'c', 'deposit'):
+            transaction_type = 'income'
+        elif marker in ('expense', 'debit', 'dr', 'd', 'withdrawal'):
+            transaction_type = 'expense'
+        else:
+            # Signed amounts: negative means money out
+            transaction_type = 'expense' if amount < 0 else 'income'
+
+    amount = abs(amount)
+    if amount == 0:
+        raise ValueError("zero amount")
+
+    category = _cell(row, columns, 'category').strip() or categorize_transaction(description, transaction_type)
+    return (transaction_type, amount, category, description, date)
+
+
+def iter_statement_chunks(file_obj, chunk_size=5000, max_errors=20):
+    """Yield (valid_rows, skipped_count, error_messages) per chunk of the file.
+
+    file_obj may be a text or binary file (e.g. a Streamlit UploadedFile);
+    only one chunk of parsed rows is held in memory at a time.
+    """
+    if isinstance(file_obj, (bytes, bytearray)):
+        file_obj = io.BytesIO(file_obj)
+    if not isinstance(file_obj, io.TextIOBase):
+        file_obj = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+
+    reader = csv.reader(file_obj)
+    header = next(reader, None)
+    if header is None:
+        raise StatementFormatError("Statement file is empty")
+    columns = _map_columns(header)
+
+    rows, skipped, errors = [], 0, []
+    for line_number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            rows.append(_parse_row(row, columns))
+        except ValueError as e:
+            skipped += 1
+            if len(errors) < max_errors:
+                errors.append(f"Line {line_number}: {e}")
+        if len(rows) >= chunk_size:
+            yield rows, skipped, errors
+            rows, skipped, errors = [], 0, []
+    if rows or skipped:
+        yield rows, skipped, errors
+
+
+def import_statement(db, user_id, file_obj, chunk_size=5000, progress_callback=None):
+    """Parse a CSV statement and bulk insert it for user_id in one transaction"""
+    skipped = 0
+    errors = []
+
+    def valid_rows():
+        nonlocal skipped
+        for rows, chunk_skipped, chunk_errors in iter_statement_chunks(file_obj, chunk_size):
+            skipped += chunk_skipped
+            errors.extend(chunk_errors[:20 - len(errors)])
+            yield from rows
+
+    result = db.bulk_import_transactions(user_id, valid_rows(), chunk_size, progress_callback)
+    result['skipped'] = skipped
+    result['errors'] = errors + result.get('errors', [])
+    return result
@@ -0,0 +1,199 @@
+"""
+Income tax engine (India, individuals below 60)
+Slab tables per financial year and regime are compiled once into NumPy
+arrays, so tax for whole arrays of incomes and deduction mixes is computed in
+one vectorized pass. Covers the standard deduction, 80C / 80D / home loan
+interest deductions (old regime only), the section 87A rebate with marginal
+relief, and 4% health and education cess. Surcharge (income above ₹50 lakh)
+is not modelled.
+
+Bulk regime report for every user:  python tax_engine.py [--year 2025-26]
+"""
+
+import argparse
+
+import numpy as np
+
+CESS_RATE = 4
+
+# Deduction caps under the old regime; the new regime allows none of these
+OLD_REGIME_DEDUCTIONS = {
+    'section_80c': 150000,
+    'section_80d': 25000,
+    'home_loan_interest': 200000,
+}
+
+OLD_REGIME = {
+    'slabs': [(250000, 0), (500000, 5), (1000000, 20), (None, 30)],
+    'standard_deduction': 50000,
+    'rebate_limit': 500000,
+    'rebate_max': 12500,
+    'marginal_relief': False,
+    'deductions': OLD_REGIME_DEDUCTIONS,
+}
+
+# (upper limit of slab or None, rate %) per financial year and regime
+TAX_RULES = {
+    '2023-24': {
+        'new': {
+            'slabs': [(300000, 0), (600000, 5), (900000, 10), (1200000, 15), (1500000, 20), (None, 30)],
+            'standard_deduction': 50000,
+            'rebate_limit': 700000,
+            'rebate_max': 25000,
+            'marginal_relief': True,
+            'deductions': {},
+        },
+        'old': OLD_REGIME,
+    },
+    '2024-25': {
+        'new': {
+            'slabs': [(300000, 0), (700000, 5), (1000000, 10), (1200000, 15), (1500000, 20), (None, 30)],
+            'standard_deduction': 75000,
+            'rebate_limit': 700000,
+            'rebate_max': 25000,
+            'marginal_relief': True,
+            'deductions': {},
+        },
+        'old': OLD_REGIME,
+    },
+    '2025-26': {
+        'new': {
+            'slabs': [(400000, 0), (800000, 5), (1200000, 10), (1600000, 15), (2000000, 20), (2400000, 25),
+                      (None, 30)],
+            'standard_deduction': 75000,
+            'rebate_limit': 1200000,
+            'rebate_max': 60000,
+            'marginal_relief': True,
+            'deductions': {},
+        },
+        'old': OLD_REGIME,
+    },
+}
+
+DEFAULT_YEAR = max(TAX_RULES)
+REGIMES = ('old', 'new')
+
+
+class TaxRegime:
+    """One year's rules for one regime, with the slab table as arrays"""
+
+    def __init__(self, year, regime, slabs, standard_deduction, rebate_limit, rebate_max, marginal_relief,
+                 deductions):
+        self.year = year
+        self.regime = regime
+        limits = np.array([np.inf if limit is None else limit for limit, _ in slabs], dtype=np.float64)
+        self.lower = np.concatenate(([0.0], limits[:-1]))
+        self.rates = np.array([rate for _, rate in slabs], dtype=np.float64) / 100
+        # Tax due on income up to the start of each slab
+        self.base_tax = np.concatenate(([0.0], np.cumsum(np.diff(self.lower) * self.rates[:-1])))
+        self.standard_deduction = standard_deduction
+        self.rebate_limit = rebate_limit
+        self.rebate_max = rebate_max
+        self.marginal_relief = marginal_relief
+        self.deduction_limits = deductions
+
+    def slab_tax(self, taxable_income):
+        """Tax on taxable income from the slabs alone (elementwise)"""
+        taxable = np.asarray(taxable_income, dtype=np.float64)
+        slab = np.searchsorted(self.lower, taxable, side='right') - 1
+        return self.base_tax[slab] + (taxable - self.lower[slab]) * self.rates[slab]
+
+    def allowed_deductions(self, **claimed):
+        """Sum of claimed deductions after this regime's caps; unknown or
+        disallowed deductions count as zero"""
+        total = 0.0
+        for name, amount in claimed.items():
+            if name in self.deduction_limits:
+                total = total + np.minimum(np.asarray(amount, dtype=np.float64), self.deduction_limits[name])
+        return total
+
+    def compute(self, gross_income, salaried=True, **claimed):
+        """Dict of arrays: deductions, taxable_income, slab_tax, rebate, cess, total_tax"""
+        gross = np.asarray(gross_income, dtype=np.float64)
+        deductions = self.allowed_deductions(**claimed)
+        if salaried:
+            deductions = deductions + self.standard_deduction
+        taxable = np.maximum(gross - deductions, 0)
+
+        tax = self.slab_tax(taxable)
+        # Section 87A: no tax up to the limit, and (new regime) never more tax than income above it
+        rebate = np.where(taxable <= self.rebate_limit, np.minimum(tax, self.rebate_max), 0.0)
+        if self.marginal_relief:
+            rebate = np.where(taxable > self.rebate_limit,
+                              np.maximum(tax - (taxable - self.rebate_limit), 0.0), rebate)
+        tax_after_rebate = tax - rebate
+        cess = tax_after_rebate * CESS_RATE / 100
+        return {
+            'deductions': np.minimum(deductions, gross),
+            'taxable_income': taxable,
+            'slab_tax': tax,
+            'rebate': rebate,
+            'cess': cess,
+            'total_tax': tax_after_rebate + cess,
+        }
+
+    def tax(self, gross_income, salaried=True, **claimed):
+        return self.compute(gross_income, salaried, **claimed)['total_tax']
+
+
+_REGIMES = {
+    (year, regime): TaxRegime(year, regime, **rules)
+    for year, regimes in TAX_RULES.items()
+    for regime, rules in regimes.items()
+}
+
+
+def get_regime(regime='new', year=DEFAULT_YEAR):
+    try:
+        return _REGIMES[(year, regime)]
+    except KeyError:
+        raise ValueError(f"no tax rules for {regime} regime in FY {year}; "
+                         f"known years: {', '.join(TAX_RULES)}") from None
+
+
+def compare_regimes(gross_income, year=DEFAULT_YEAR, salaried=True, **claimed):
+    """Old vs new regime tax for arrays of incomes and deductions (broadcast
+    together), with which regime is cheaper and by how much"""
+    old_tax = get_regime('old', year).tax(gross_income, salaried, **claimed)
+    new_tax = get_regime('new', year).tax(gross_income, salaried, **claimed)
+    return {
+        'old_regime_tax': old_tax,
+        'new_regime_tax': new_tax,
+        'better_regime': np.where(old_tax < new_tax, 'old', 'new'),
+        'saving': np.abs(old_tax - new_tax),
+    }
+
+
+def regime_report(incomes, year=DEFAULT_YEAR, **claimed):
+    """Summary of compare_regimes over many (annual) incomes"""
+    incomes = np.asarray(incomes, dtype=np.float64)
+    comparison = compare_regimes(incomes, year, **claimed)
+    prefer_old = comparison['better_regime'] == 'old'
+    return {
+        'users': int(incomes.size),
+        'prefer_old': int(prefer_old.sum()),
+        'prefer_new': int(incomes.size - prefer_old.sum()),
+        'total_saving': float(comparison['saving'].sum()),
+        'comparison': comparison,
+    }
+
+
+if __name__ == "__main__":
+    from database_local import LocalDatabaseManager
+
+    parser = argparse.ArgumentParser(description="Which tax regime saves more, for every user")
+    parser.add_argument("--db", default="shefin_local.db")
+    parser.add_argument("--year", default=DEFAULT_YEAR, choices=list(TAX_RULES))
+    for name in OLD_REGIME_DEDUCTIONS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=0,
+                            help=f"Assumed yearly {name} deduction for every user")
+    args = parser.parse_args()
+
+    incomes = LocalDatabaseManager(args.db).get_all_user_incomes()
+    claimed = {name: getattr(args, name) for name in OLD_REGIME_DEDUCTIONS}
+    report = regime_report([monthly * 12 for monthly in incomes.values()], args.year, **claimed)
+    print(f"FY {args.year}: {report['users']} users; old regime better for {report['prefer_old']}, "
+          f"new regime for {report['prefer_new']}; total saving by choosing well ₹{report['total_saving']:,.0f}")
+    for (user_id, monthly), regime, saving in zip(incomes.items(), report['comparison']['better_regime'],
+                                                  report['comparison']['saving']):
+        print(f"  user {user_id}: ₹{monthly * 12:,.0f}/yr -> {regime} regime (saves ₹{saving:,.0f})")
@@ -247,6 +247,22 @@ TRANSLATIONS = {
         "hindi": "दिनांक सीमा",
         "tamil": "தேதி வரம்பு"
     },
+    "No transactions match these filters": {
+        "hindi": "इन फ़िल्टर से कोई लेनदेन मेल नहीं खाता",
+        "tamil": "இந்த வடிகட்டிகளுக்குப் பொருந்தும் பரிவர்த்தனைகள் இல்லை"
+    },
+    "Previous Page": {
+        "hindi": "पिछला पृष्ठ",
+        "tamil": "முந்தைய பக்கம்"
+    },
+    "Next Page": {
+        "hindi": "अगला पृष्ठ",
+        "tamil": "அடுத்த பக்கம்"
+    },
+    "Page": {
+        "hindi": "पृष्ठ",
+        "tamil": "பக்கம்"
+    },
     "All": {
         "hindi": "सभी",
         "tamil": "அனைத்து"
@@ -0,0 +1,55 @@
+"""
+Request-scoped access to one user's data
+A fresh UserDataContext is created for every Streamlit rerun; each piece of
+data is loaded from the database at most once and then shared by every tab
+and service that asks for it during that rerun
+"""
+
+from functools import cached_property
+
+
+class UserDataContext:
+    def __init__(self, db, user_id):
+        self.db = db
+        self.user_id = user_id
+
+    @cached_property
+    def profile(self):
+        """User profile dict (or None)"""
+        return self.db.get_user_profile(self.user_id)
+
+    @cached_property
+    def transactions(self):
+        """Full transaction list, newest first"""
+        return self.db.get_user_transactions(self.user_id)
+
+    @cached_property
+    def transaction_totals(self):
+        """Income/expense totals and counts aggregated in SQL"""
+        return self.db.get_transaction_totals(self.user_id)
+
+    @cached_property
+    def goals(self):
+        """Financial goals, newest first"""
+        return self.db.get_user_goals(self.user_id)
+
+    @cached_property
+    def learning_progress(self):
+        """Completed education modules"""
+        return self.db.get_learning_progress(self.user_id)
+
+    @property
+    def transaction_count(self):
+        """Number of transactions without loading them"""
+        if 'transactions' in self.__dict__:
+            return len(self.transactions)
+        totals = self.transaction_totals
+        return totals['income_count'] + totals['expense_count']
+
+    def invalidate(self, *names):
+        """Drop loaded data after a write so the next access re-reads it.
+
+        With no names everything is dropped.
+        """
+        for name in names or ('profile', 'transactions', 'transaction_totals', 'goals', 'learning_progress'):
+            self.__dict__.pop(name, None)